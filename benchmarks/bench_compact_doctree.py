@@ -0,0 +1,104 @@
+"""Benchmark the size and pickling cost of doctrees with and without compact mode.
+
+Usage: python benchmarks/bench_compact_doctree.py [NUM_COMPONENTS] [JOBS]
+
+Builds a project with several pages documenting a synthetic configuration, in both
+modes:
+
+- full: the nodes parsed from the generated Markdown are pickled with the doctree;
+- compact: with ymmsl_compact_doctree, the generated nodes are pickled and compressed
+  on their own, with the text for the search index, and are unpacked again by the
+  write workers.
+
+For both, the size of the pickled doctree of a page is reported, together with the
+time to pickle it and to load it again, as happens when Sphinx writes the doctree after
+reading the page and when it loads it for writing the output (best of 7). The write
+phase is then timed on its own (best of 3), by writing all pages again from the saved
+environment with JOBS parallel processes (default 2), as with sphinx-build -j JOBS.
+"""
+
+import pickle
+import sys
+import tempfile
+import time
+import timeit
+from io import StringIO
+from pathlib import Path
+
+from bench_templates import synthetic_ymmsl
+from sphinx.application import Sphinx
+from sphinx.util.docutils import docutils_namespace
+
+NUM_PAGES = 8
+
+
+def make_app(srcdir: Path, outdir: Path, compact: bool, jobs: int, fresh: bool):
+    """Create a Sphinx application for the project, in its own docutils namespace."""
+    return Sphinx(
+        srcdir,
+        srcdir,
+        outdir,
+        outdir / ".doctrees",
+        "html",
+        confoverrides={"ymmsl_compact_doctree": compact},
+        status=StringIO(),
+        warning=sys.stderr,
+        freshenv=fresh,
+        parallel=jobs,
+    )
+
+
+def write_time(srcdir: Path, outdir: Path, compact: bool, jobs: int) -> float:
+    """
+    Build the project, then time writing all pages again without reading them,
+    returns the best duration of the write phase.
+    """
+    # Keep directives and roles from being registered twice in this process
+    with docutils_namespace():
+        make_app(srcdir, outdir, compact, jobs, fresh=True).build()
+
+    durations = []
+    for _ in range(3):
+        with docutils_namespace():
+            app = make_app(srcdir, outdir, compact, jobs, fresh=False)
+            start = time.perf_counter()
+            app.builder.build_all()
+            durations.append(time.perf_counter() - start)
+    return min(durations)
+
+
+def main() -> None:
+    num_components = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    jobs = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+    print(
+        f"{NUM_PAGES} pages with {num_components} components each, "
+        f"written with -j {jobs}:"
+    )
+    with tempfile.TemporaryDirectory() as tmpdir:
+        srcdir = Path(tmpdir) / "src"
+        srcdir.mkdir()
+        (srcdir / "conf.py").write_text('extensions = ["sphinx_ymmsl"]\n')
+        pages = [f"page_{i}" for i in range(NUM_PAGES)]
+        toctree = "".join(f"   {page}\n" for page in pages)
+        index = f"Models\n======\n\n.. toctree::\n\n{toctree}"
+        (srcdir / "index.rst").write_text(index)
+        for page in pages:
+            (srcdir / f"{page}.rst").write_text(".. ymmsl:: large.ymmsl\n")
+        (srcdir / "large.ymmsl").write_text(synthetic_ymmsl(num_components))
+
+        for name, compact in (("full", False), ("compact", True)):
+            outdir = Path(tmpdir) / name
+            duration = write_time(srcdir, outdir, compact, jobs)
+            data = (outdir / ".doctrees" / f"{pages[0]}.doctree").read_bytes()
+            doctree = pickle.loads(data)
+            dump = min(timeit.repeat(lambda d=doctree: pickle.dumps(d), number=5))
+            load = min(timeit.repeat(lambda d=data: pickle.loads(d), number=5))
+            print(
+                f"  {name:8} {len(data) / 1024:8.1f} KiB"
+                f"  pickle {dump / 5 * 1e3:7.2f} ms  load {load / 5 * 1e3:7.2f} ms"
+                f"  write {duration:6.2f} s"
+            )
+
+
+if __name__ == "__main__":
+    main()
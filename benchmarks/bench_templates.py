@@ -0,0 +1,129 @@
+"""Benchmark rendering Markdown with the default and with Jinja2 templates.
+
+Usage: python benchmarks/bench_templates.py [NUM_COMPONENTS]
+
+Compares rendering all models of a synthetic configuration with:
+
+- baseline: the hard-coded f-strings that were used before templates were introduced;
+- default: the default templates compiled to Python functions, as happens for every
+  template that only uses what sphinx_ymmsl.template_compiler supports;
+- jinja: the same default templates, rendered by Jinja2 as happens for templates that
+  cannot be compiled.
+
+The baseline output lacks the ymmsl-<section> containers, so only default and jinja are
+checked to give the same output.
+"""
+
+import sys
+import tempfile
+import timeit
+from pathlib import Path
+
+from sphinx_ymmsl.markdown_utilities import demote_markdown_headers, format_title
+from sphinx_ymmsl.templates import MarkdownTemplates, get_templates
+from sphinx_ymmsl.ymmsl_to_markdown import load_configuration, model_markdown
+
+
+def synthetic_ymmsl(num_components: int) -> str:
+    """yMMSL content for a model with a ring of coupled components."""
+    lines = ["ymmsl_version: v0.2", "models:", "  large_model:", "    components:"]
+    for i in range(num_components):
+        lines.extend(
+            [
+                f"      comp_{i}:",
+                "        ports: {f_init: init_in, o_i: state_out}",
+                f"        description: Component number {i}",
+                f"        implementation: comp_{i}_program",
+            ]
+        )
+    lines.append("    conduits:")
+    for i in range(num_components):
+        receiver = (i + 1) % num_components
+        lines.append(f"      comp_{i}.state_out: comp_{receiver}.init_in")
+    return "\n".join(lines) + "\n"
+
+
+def _baseline_table(headers, rows) -> str:
+    lines = ["| " + " | ".join(headers) + " |"]
+    lines.append("| " + " | ".join(["-" * len(h) for h in headers]) + " |")
+    for row in rows:
+        row_str = " | ".join(str(cell) if cell is not None else "" for cell in row)
+        lines.append(f"| {row_str} |")
+    return "\n".join(lines)
+
+
+def _baseline_ports(ports, header_level=None, header_text=None):
+    if not ports:
+        return []
+    lines = [f"{'#' * header_level} {header_text}"] if header_level else []
+    rows = [(ports[port_name].operator.name, port_name) for port_name in ports]
+    lines.extend([_baseline_table(["Operator", "Port Name"], rows), ""])
+    return lines
+
+
+def baseline_model_markdown(cfg) -> str:
+    """model_markdown() as it was implemented before templates were introduced."""
+    if not cfg.models:
+        return ""
+
+    lines = ["## Models", ""]
+    for model_name, model_data in cfg.models.items():
+        lines.append(f"### {format_title(model_name)}")
+        if model_data.description:
+            desc = demote_markdown_headers(model_data.description.strip(), level=3)
+            lines.extend([desc, ""])
+        lines.extend(_baseline_ports(model_data.ports, 3, "Model Ports"))
+        for comp_name, component in model_data.components.items():
+            lines.append(f"#### {format_title(comp_name)}")
+            if component.description:
+                desc = demote_markdown_headers(component.description.strip(), level=4)
+                lines.extend([desc, ""])
+            lines.extend(_baseline_ports(component.ports))
+            if component.implementation:
+                lines.extend([f"**Implementation**: `{component.implementation}`", ""])
+            if component.multiplicity:
+                lines.extend([f"**Multiplicity**: `{component.multiplicity}`", ""])
+        if model_data.conduits:
+            lines.append("#### Conduits")
+            for conduit in model_data.conduits:
+                lines.append(f"* {conduit.sender}: {conduit.receiver}")
+            lines.append("")
+        if model_data.supported_settings:
+            lines.append("#### Supported Settings")
+            rows = [
+                (name, str(setting.typ), setting.description or "")
+                for name, setting in model_data.supported_settings
+            ]
+            lines.extend([_baseline_table(["Parameter", "Type", "Description"], rows)])
+            lines.extend(["", "For more information about the types: ...", ""])
+
+    return "\n".join(lines)
+
+
+def main() -> None:
+    num_components = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "large.ymmsl"
+        path.write_text(synthetic_ymmsl(num_components))
+        cfg = load_configuration(path)
+
+    default, jinja = get_templates(), MarkdownTemplates(compiled=False)
+    assert model_markdown(cfg, default) == model_markdown(cfg, jinja)
+    variants = {
+        "baseline": lambda: baseline_model_markdown(cfg),
+        "default": lambda: model_markdown(cfg, default),
+        "jinja": lambda: model_markdown(cfg, jinja),
+    }
+
+    print(f"Rendering {num_components} components, best of 7 runs:")
+    for name, render in variants.items():
+        runs = timeit.repeat(render, number=10, repeat=7)
+        best = min(runs) / 10
+        print(
+            f"  {name:8} {best * 1e3:8.2f} ms"
+            f"  ({best / num_components * 1e6:.1f} us per component)"
+        )
+
+
+if __name__ == "__main__":
+    main()
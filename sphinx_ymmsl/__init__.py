@@ -4,18 +4,52 @@
 
 import importlib.metadata
 from pathlib import Path
+from typing import Dict, Optional
 
+import jinja2
 from docutils import nodes
-from myst_parser.parsers.sphinx_ import MystParser
 from sphinx.application import Sphinx
+from sphinx.environment import BuildEnvironment
+from sphinx.errors import ConfigError
 from sphinx.util import logging
-from sphinx.util.docutils import SphinxDirective, new_document
+from sphinx.util.docutils import SphinxDirective
 from sphinx.util.typing import ExtensionMetadata
 
-from .ymmsl_to_markdown import ymmsl_to_markdown
+from .compact import (
+    TRANSLATORS,
+    ExpandCompactNodes,
+    PackGeneratedNodes,
+    add_builder_expansion,
+    compact_node_list,
+    parse_markdown,
+    visit_ymmsl_markdown,
+    ymmsl_markdown,
+)
+from .memory_profiling import MemoryProfiler, format_memory_report
+from .render_cache import RenderedYmmsl, export_bundle, import_bundle, render_key
+from .search import (
+    SEARCH_SECTIONS,
+    EntityIndex,
+    collect_entities,
+)
+from .templates import get_templates
+from .versions import UnsupportedYmmslVersion, YmmslVersion, get_ymmsl_version
+from .ymmsl_to_markdown import (
+    VERSION_SNIFF_BYTES,
+    extract_version_from_file,
+    load_version,
+)
 
 logger = logging.getLogger(__name__)
 
+# Attributes of the build environment holding per-document data, as dictionaries by
+# document name
+ENV_DATA = ("ymmsl_memory_profile", "ymmsl_entities", "ymmsl_rendered")
+
+# Rendered documentation imported from a render cache bundle, by key. This is kept out
+# of the environment, so that it is not pickled with it.
+imported_renders: Dict[str, RenderedYmmsl] = {}
+
 
 class YmmslDirective(SphinxDirective):
     """Sphinx directive to generate documentation for all models and components in a
@@ -27,24 +61,237 @@ class YmmslDirective(SphinxDirective):
     def run(self) -> list[nodes.Node]:
         """Process yMMSL file and generate corresponding node list"""
         filename = self.arguments[0]
-        logger.info("Generating documentation from ymmsl file: %s", filename)
-
+        docname = self.env.docname
+        profiler = MemoryProfiler(enabled=self.config.ymmsl_memory_profile)
         ymmsl_path = Path(self.env.srcdir) / filename
-        markdown = ymmsl_to_markdown(ymmsl_path)
+        self.env.note_dependency(filename)
 
-        # Use myst_parser for generated markdown. Adapted from sphinx-autodoc2
-        # https://github.com/sphinx-extensions2/sphinx-autodoc2/blob/main/src/autodoc2/sphinx/docstring.py
-        document = new_document(filename, self.state.document.settings)
-        parser = MystParser()
-        parser.parse(markdown, document)
+        # Reject files in unsupported versions before reading all of them
+        version = extract_version_from_file(
+            ymmsl_path, self.config.ymmsl_version_sniff_bytes
+        )
+        if version is None:
+            version = load_version(ymmsl_path)
+        try:
+            handler = get_ymmsl_version(version)
+        except UnsupportedYmmslVersion as exc:
+            logger.warning(
+                "Cannot document ymmsl file %s: %s",
+                filename,
+                exc,
+                location=self.get_location(),
+                type="ymmsl",
+                subtype="version",
+            )
+            return []
+
+        # Hashing the file is only needed if the render cache is used
+        key = None
+        if imported_renders or self.config.ymmsl_cache_export:
+            key = render_key(
+                ymmsl_path,
+                self.config.ymmsl_templates,
+                {
+                    "topology": self.config.ymmsl_topology,
+                    "topology_limit": self.config.ymmsl_topology_limit,
+                },
+            )
+        rendered = imported_renders.get(key) if key else None
+        if rendered is None:
+            logger.info("Generating documentation from ymmsl file: %s", filename)
+            rendered = self.render(ymmsl_path, version, handler, profiler)
+        else:
+            logger.info("Using cached documentation for ymmsl file: %s", filename)
+        if key and self.config.ymmsl_cache_export:
+            # Only kept for exporting, as it is pickled with the environment
+            self.env.ymmsl_rendered.setdefault(docname, {})[key] = rendered
+
+        with profiler.measure(filename, "parse"):
+            node_list = parse_markdown(
+                rendered.markdown,
+                filename,
+                self.state.document.settings,
+                self.config.ymmsl_search_exclude,
+            )
+
+        entities = self.env.ymmsl_entities.setdefault(docname, [])
+        entities.extend(collect_entities(rendered.entities, docname, node_list))
+
+        if self.config.ymmsl_compact_doctree:
+            node_list = compact_node_list(filename, docname, node_list)
+
+        if profiler.enabled:
+            records = self.env.ymmsl_memory_profile.setdefault(docname, [])
+            records.extend(profiler.records)
+
+        return node_list
+
+    def render(
+        self,
+        ymmsl_path: Path,
+        version: str,
+        handler: YmmslVersion,
+        profiler: MemoryProfiler,
+    ) -> RenderedYmmsl:
+        """Load the yMMSL file and render its documentation."""
+        filename = self.arguments[0]
+        templates = get_templates(self.config.ymmsl_templates)
+        with profiler.measure(filename, "load"):
+            cfg = handler.load(ymmsl_path)
+        with profiler.measure(filename, "markdown"):
+            markdown = handler.render(
+                ymmsl_path,
+                cfg,
+                templates,
+                topology=self.config.ymmsl_topology,
+                topology_limit=self.config.ymmsl_topology_limit,
+                version=version,
+            )
+        return RenderedYmmsl(markdown, tuple(handler.entities(cfg)))
+
+
+def check_config(app: Sphinx) -> None:
+    """Check the configuration, and compile the templates once for the whole build."""
+    try:
+        get_templates(app.config.ymmsl_templates)
+    except (ValueError, jinja2.TemplateSyntaxError) as exc:
+        raise ConfigError(f"Invalid ymmsl_templates: {exc}") from exc
+
+    unknown = sorted(set(app.config.ymmsl_search_exclude) - set(SEARCH_SECTIONS))
+    if unknown:
+        raise ConfigError(
+            f"Invalid ymmsl_search_exclude: unknown section(s) {', '.join(unknown)}. "
+            f"Available sections: {', '.join(SEARCH_SECTIONS)}"
+        )
+
+
+def init_env_data(app: Sphinx) -> None:
+    """Make sure the environment can hold our data, also for a pickled env."""
+    for attr in ENV_DATA:
+        if not hasattr(app.env, attr):
+            setattr(app.env, attr, {})
+
+
+def purge_env_data(app: Sphinx, env: BuildEnvironment, docname: str) -> None:
+    """Forget the data of a document that is read again."""
+    for attr in ENV_DATA:
+        getattr(env, attr).pop(docname, None)
 
-        self.env.note_dependency(filename)
-        return document.children
+
+def merge_env_data(
+    app: Sphinx, env: BuildEnvironment, docnames: set, other: BuildEnvironment
+) -> None:
+    """Merge data collected by parallel read workers."""
+    for attr in ENV_DATA:
+        data, other_data = getattr(env, attr), getattr(other, attr)
+        for docname in docnames:
+            if docname in other_data:
+                data[docname] = other_data[docname]
+
+
+def import_render_cache(app: Sphinx) -> None:
+    """Warm the render cache from a bundle file, if configured."""
+    imported_renders.clear()
+    if not app.config.ymmsl_cache_import:
+        return
+
+    path = Path(app.confdir) / app.config.ymmsl_cache_import
+    if not path.exists():
+        logger.info("No yMMSL render cache bundle at %s, starting cold", path)
+        return
+
+    try:
+        entries, dropped = import_bundle(path)
+    except (OSError, ValueError) as exc:
+        logger.warning("Could not import yMMSL render cache bundle: %s", exc)
+        return
+
+    imported_renders.update(entries)
+    logger.info(
+        "Imported %d rendered yMMSL file(s) from %s, dropped %d stale or invalid",
+        len(entries),
+        path,
+        dropped,
+    )
+
+
+def export_render_cache(app: Sphinx, exception: Optional[Exception]) -> None:
+    """Write the rendered documentation of all documents to a bundle, if configured."""
+    if exception is not None or not app.config.ymmsl_cache_export:
+        return
+
+    entries = {}
+    for rendered in app.env.ymmsl_rendered.values():
+        entries.update(rendered)
+
+    path = Path(app.confdir) / app.config.ymmsl_cache_export
+    export_bundle(path, entries)
+    logger.info("Exported %d rendered yMMSL file(s) to %s", len(entries), path)
+
+
+def report_memory_profile(app: Sphinx, exception: Optional[Exception]) -> None:
+    """Log the memory used per yMMSL file and stage at the end of the build."""
+    if exception is not None or not app.config.ymmsl_memory_profile:
+        return
+
+    records = [r for rs in app.env.ymmsl_memory_profile.values() for r in rs]
+    logger.info("yMMSL memory profile (%d stages):", len(records))
+    for line in format_memory_report(records):
+        logger.info("  %s", line)
+
+
+def write_entity_index(app: Sphinx, exception: Optional[Exception]) -> None:
+    """Write the index of documented yMMSL entities for HTML builders."""
+    if exception is not None or app.builder.format != "html":
+        return
+    if not app.config.ymmsl_entity_index:
+        return
+
+    entities = [e for es in app.env.ymmsl_entities.values() for e in es]
+    if not entities:
+        return
+
+    uris = {
+        docname: app.builder.get_target_uri(docname)
+        for docname in app.env.ymmsl_entities
+    }
+    static_dir = Path(app.outdir) / "_static"
+    static_dir.mkdir(parents=True, exist_ok=True)
+    index_path = static_dir / "ymmsl-entities.json"
+    index_path.write_text(EntityIndex(entities).to_json(uris), encoding="utf-8")
 
 
 def setup(app: Sphinx) -> ExtensionMetadata:
     """Setup sphinx extension."""
     app.add_directive("ymmsl", YmmslDirective)
+    app.add_node(
+        ymmsl_markdown,
+        **{name: (visit_ymmsl_markdown, None) for name in TRANSLATORS},
+    )
+    app.add_config_value("ymmsl_memory_profile", False, "env", bool)
+    app.add_config_value("ymmsl_templates", {}, "env", dict)
+    app.add_config_value("ymmsl_search_exclude", [], "env", list)
+    app.add_config_value("ymmsl_entity_index", True, "", bool)
+    app.add_config_value("ymmsl_cache_import", None, "", (str, type(None)))
+    # Rendered documentation is only recorded while reading if this is set, so all
+    # documents need to be read again when it changes
+    app.add_config_value("ymmsl_cache_export", None, "env", (str, type(None)))
+    app.add_config_value("ymmsl_version_sniff_bytes", VERSION_SNIFF_BYTES, "env", int)
+    app.add_config_value("ymmsl_topology", False, "env", bool)
+    app.add_config_value("ymmsl_topology_limit", None, "env", (int, type(None)))
+    app.add_config_value("ymmsl_compact_doctree", False, "env", bool)
+
+    app.connect("builder-inited", check_config)
+    app.connect("builder-inited", init_env_data)
+    app.connect("builder-inited", import_render_cache)
+    app.connect("builder-inited", add_builder_expansion)
+    app.connect("env-purge-doc", purge_env_data)
+    app.connect("env-merge-info", merge_env_data)
+    app.add_transform(PackGeneratedNodes)
+    app.add_post_transform(ExpandCompactNodes)
+    app.connect("build-finished", report_memory_profile)
+    app.connect("build-finished", write_entity_index)
+    app.connect("build-finished", export_render_cache)
 
     # We need myst_parser to process the markdown we generate
     app.setup_extension("myst_parser")
@@ -0,0 +1,233 @@
+"""Compact doctree output for generated yMMSL documentation.
+
+Normally the nodes that are parsed from the generated Markdown are pickled with the
+doctree of the page, and for large yMMSL files they make up most of it. In compact
+mode the generated nodes are only kept as they are while the page is read, so that
+titles, the table of contents and reference targets are collected from them as usual.
+Before the doctree is pickled they are replaced by a single ymmsl_markdown node holding
+them pickled and compressed, and the titles and text of the generated sections for the
+search index. The doctree stays compact while it is resolved, and the nodes are only
+unpacked by the translator that writes the page, which runs in the write workers in
+parallel builds.
+
+Unpacking the nodes is much faster than parsing the Markdown again, and the nodes have
+been through all transforms that Sphinx and other extensions apply while reading.
+"""
+
+import pickle
+import zlib
+from itertools import takewhile
+from typing import Collection, Dict, Iterable, List
+
+from docutils import nodes
+from myst_parser.parsers.sphinx_ import MystParser
+from sphinx.application import Sphinx
+from sphinx.transforms import SphinxTransform
+from sphinx.transforms.post_transforms import SphinxPostTransform
+from sphinx.util.docutils import SphinxTranslator, new_document
+
+from .search import exclude_from_search
+
+# Attribute that marks the generated nodes that follow a ymmsl_markdown node
+COMPACT_ATTRIBUTE = "ymmsl_compact"
+
+# Attribute that marks the documents in which ymmsl_markdown nodes are expanded
+EXPAND_ATTRIBUTE = "ymmsl_expand"
+
+# Builder names and formats with a translator that expands ymmsl_markdown nodes. The
+# Texinfo translator names all sections of a document before writing it, so it cannot
+# expand the nodes while writing, and the nodes are expanded before it instead.
+TRANSLATORS = ("html", "latex", "text", "man")
+
+
+class ymmsl_markdown(nodes.General, nodes.Element):
+    """
+    Generated documentation in compact form.
+
+    Attributes:
+        nodes: The nodes parsed from the generated Markdown, see pack_nodes().
+        filename: Name of the yMMSL file that the documentation was generated for.
+        docname: Name of the document that the documentation is part of.
+
+    The children of the node are the titles and text of the generated sections, which
+    are only used for the search index.
+    """
+
+
+def parse_markdown(
+    markdown: str,
+    filename: str,
+    settings,
+    search_exclude: Collection[str],
+) -> List[nodes.Node]:
+    """
+    Parse generated Markdown into nodes, excluding the given sections from search.
+
+    settings: The settings of the document that the nodes are inserted into.
+    """
+    # Use myst_parser for generated markdown. Adapted from sphinx-autodoc2
+    # https://github.com/sphinx-extensions2/sphinx-autodoc2/blob/main/src/autodoc2/sphinx/docstring.py
+    document = new_document(filename, settings)
+    parser = MystParser()
+    parser.parse(markdown, document)
+    exclude_from_search(document.children, search_exclude)
+    return document.children
+
+
+def compact_node_list(
+    filename: str, docname: str, node_list: List[nodes.Node]
+) -> List[nodes.Node]:
+    """
+    Get the nodes to return from the directive in compact mode: a ymmsl_markdown node,
+    followed by the parsed nodes marked for PackGeneratedNodes.
+    """
+    for node in node_list:
+        if isinstance(node, nodes.Element):
+            node[COMPACT_ATTRIBUTE] = True
+    compact = ymmsl_markdown(filename=filename, docname=docname)
+    return [compact, *node_list]
+
+
+def pack_nodes(node_list: List[nodes.Node]) -> bytes:
+    """
+    Pickle and compress nodes that have been removed from their document.
+
+    The nodes are detached from the document, so that it is not pickled with them.
+    """
+    for node in node_list:
+        node.parent = None
+        for descendant in node.findall():
+            descendant.document = None
+    return zlib.compress(pickle.dumps(node_list, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def unpack_nodes(data: bytes, document: nodes.document) -> List[nodes.Node]:
+    """Get the nodes packed by pack_nodes(), to be inserted into a document."""
+    node_list = pickle.loads(zlib.decompress(data))
+    for node in node_list:
+        for descendant in node.findall():
+            descendant.document = document
+    return node_list
+
+
+def _is_generated(node: nodes.Node) -> bool:
+    return isinstance(node, nodes.Element) and node.get(COMPACT_ATTRIBUTE, False)
+
+
+def _is_searchable(node: nodes.Node) -> bool:
+    if not isinstance(node, nodes.Element):
+        return True
+    return not isinstance(node, nodes.comment) and "no-search" not in node["classes"]
+
+
+def _search_nodes(node_list: Iterable[nodes.Node]) -> List[nodes.Node]:
+    """
+    Get the titles and text of generated nodes that the search index needs.
+
+    Sections keep their ids and titles, all other searchable content is kept as text.
+    The search index only records which words occur on a page, so each word is kept
+    once.
+    """
+    result: List[nodes.Node] = []
+    words: Dict[str, None] = {}
+    for node in node_list:
+        if isinstance(node, nodes.section):
+            section = nodes.section(ids=node["ids"])
+            section += nodes.title(text=node[0].astext())
+            section.extend(_search_nodes(node[1:]))
+            result.append(section)
+        elif _is_searchable(node):
+            words.update(dict.fromkeys(node.astext().split()))
+    if words:
+        result.insert(0, nodes.Text(" ".join(words)))
+    return result
+
+
+class PackGeneratedNodes(SphinxTransform):
+    """
+    Move the marked generated nodes of a doctree into the ymmsl_markdown node before
+    them, keeping what the search index needs.
+
+    This runs after all other transforms that Sphinx applies while reading, including
+    the doctree-read event, so that the generated nodes are transformed and collected
+    as usual before the doctree is pickled.
+    """
+
+    default_priority = 999
+
+    def apply(self, **kwargs) -> None:
+        for compact in list(self.document.findall(ymmsl_markdown)):
+            siblings = compact.findall(include_self=False, descend=False, siblings=True)
+            generated = list(takewhile(_is_generated, siblings))
+            for node in generated:
+                node.parent.remove(node)
+                del node[COMPACT_ATTRIBUTE]
+            compact["nodes"] = pack_nodes(generated)
+            compact.extend(_search_nodes(generated))
+
+
+def visit_ymmsl_markdown(self: SphinxTranslator, node: ymmsl_markdown) -> None:
+    """
+    Write the generated nodes of a ymmsl_markdown node.
+
+    The nodes are unpacked into a separate document, to which the post-transforms are
+    applied to resolve their references, and are then written in place of the node.
+    """
+    document = new_document(node["filename"], self.document.settings)
+    document[EXPAND_ATTRIBUTE] = True
+    document += ymmsl_markdown(**node.attributes)
+    self.builder.env.apply_post_transforms(document, node["docname"])
+    for child in document.children:
+        child.walkabout(self)
+    raise nodes.SkipNode
+
+
+def expanded_by_translator(app: Sphinx) -> bool:
+    """
+    Whether the translator of the builder expands ymmsl_markdown nodes when writing.
+
+    Like Sphinx, this looks up the handlers by builder name first, then by format.
+    """
+    handlers = app.registry.translation_handlers
+    builder_handlers = handlers.get(app.builder.name)
+    if builder_handlers is None:
+        builder_handlers = handlers.get(app.builder.format, {})
+    return ymmsl_markdown.__name__ in builder_handlers
+
+
+class ExpandCompactNodes(SphinxPostTransform):
+    """
+    Replace ymmsl_markdown nodes by their generated nodes, in the documents created
+    by visit_ymmsl_markdown() only.
+
+    This runs before references are resolved, so that references in the generated
+    documentation are resolved as usual.
+    """
+
+    default_priority = 5
+    fragments_only = True
+
+    def run(self, **kwargs) -> None:
+        if self.fragments_only and not self.document.get(EXPAND_ATTRIBUTE, False):
+            return
+        for node in list(self.document.findall(ymmsl_markdown)):
+            node.replace_self(unpack_nodes(node["nodes"], self.document))
+
+
+class ExpandAllCompactNodes(ExpandCompactNodes):
+    """
+    Replace ymmsl_markdown nodes by their generated nodes in all documents, for
+    builders of which the translator does not expand them, like gettext, xml and
+    linkcheck.
+    """
+
+    fragments_only = False
+
+
+def add_builder_expansion(app: Sphinx) -> None:
+    """
+    Expand ymmsl_markdown nodes before the pages are written, if the builder does not
+    expand them when writing.
+    """
+    if app.config.ymmsl_compact_doctree and not expanded_by_translator(app):
+        app.add_post_transform(ExpandAllCompactNodes)
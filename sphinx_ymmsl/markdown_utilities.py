@@ -1,6 +1,8 @@
 """Utilities for generating a markdown file based on a ymmsl file."""
 
-from typing import Any, Iterable, List
+from typing import Any, Iterable, List, Optional, Sequence
+
+from .templates import MarkdownTemplates, get_templates
 
 
 def format_title(name: str) -> str:
@@ -24,13 +26,18 @@ def demote_markdown_headers(text: str, level: int = 1) -> str:
     return "\n".join(new_lines)
 
 
-def markdown_table(headers: List[str], rows: Iterable[Any]) -> str:
+def markdown_table(
+    headers: List[str],
+    rows: Iterable[Any],
+    templates: Optional[MarkdownTemplates] = None,
+) -> str:
     """
     Create a Markdown table.
 
     Args:
         headers: List of column headers.
         rows: Iterable of row iterables.
+        templates: Templates to render the table with, the default templates if None.
     """
     bad_headers = [h for h in headers if "|" in h]
     if bad_headers:
@@ -38,12 +45,17 @@ def markdown_table(headers: List[str], rows: Iterable[Any]) -> str:
         # table column separator.
         headers = [h.replace("|", r"\|") for h in headers]
 
-    table_lines = []
-    table_lines.append("| " + " | ".join(headers) + " |")
-    table_lines.append("| " + " | ".join(["-" * len(h) for h in headers]) + " |")
+    rows = [[str(cell) if cell is not None else "" for cell in row] for row in rows]
+    return render_table(headers, rows, templates or get_templates())
+
 
-    for row in rows:
-        row_str = " | ".join(str(cell) if cell is not None else "" for cell in row)
-        table_lines.append(f"| {row_str} |")
+def render_table(
+    headers: List[str], rows: List[Sequence[str]], templates: MarkdownTemplates
+) -> str:
+    """
+    Render a Markdown table of which the headers and cells are already strings.
 
-    return "\n".join(table_lines)
+    This is markdown_table() without the conversion of the cells, for the tables that
+    are generated from yMMSL files.
+    """
+    return templates.render("table", headers=headers, rows=rows).removesuffix("\n")
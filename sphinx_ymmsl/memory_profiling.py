@@ -0,0 +1,94 @@
+"""Memory profiling of the stages that turn a yMMSL file into documentation."""
+
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator, List
+
+from .ymmsl_to_markdown import configuration_markdown, load_configuration
+
+
+@dataclass
+class StageMemory:
+    """
+    Memory usage of a single stage for a single yMMSL file.
+
+    source: Name of the yMMSL file that was processed.
+    stage: Name of the processing stage, e.g. "load", "markdown" or "parse".
+    peak: Peak memory (in bytes) allocated on top of what was in use before the stage.
+    retained: Memory (in bytes) that is still allocated after the stage finished.
+    """
+
+    source: str
+    stage: str
+    peak: int
+    retained: int
+
+
+class MemoryProfiler:
+    """
+    Measure the peak and retained memory of processing stages using tracemalloc.
+
+    When the profiler is disabled, measure() does nothing, so it can stay in place in
+    code paths that are not being profiled.
+    """
+
+    def __init__(self, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self.records: List[StageMemory] = []
+
+    @contextmanager
+    def measure(self, source: str, stage: str) -> Iterator[None]:
+        """
+        Record the memory allocated while the body of the with-statement runs.
+
+        tracemalloc is started when it is not tracing yet, and stopped again afterwards.
+        Note that the peak of an already running tracemalloc session is reset.
+        """
+        if not self.enabled:
+            yield
+            return
+
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        try:
+            yield
+        finally:
+            current, peak = tracemalloc.get_traced_memory()
+            if started:
+                tracemalloc.stop()
+            self.records.append(
+                StageMemory(source, stage, peak - before, current - before)
+            )
+
+
+def profile_ymmsl_file(ymmsl_path: Path) -> List[StageMemory]:
+    """
+    Profile loading a yMMSL file and generating its Markdown documentation.
+
+    Returns the memory usage of the "load" and "markdown" stages.
+    """
+    profiler = MemoryProfiler()
+    with profiler.measure(ymmsl_path.name, "load"):
+        cfg = load_configuration(ymmsl_path)
+    with profiler.measure(ymmsl_path.name, "markdown"):
+        configuration_markdown(ymmsl_path, cfg)
+    return profiler.records
+
+
+def format_memory_report(records: Iterable[StageMemory]) -> List[str]:
+    """
+    Format memory records as report lines, sorted by peak memory (largest first).
+    """
+    lines = []
+    for record in sorted(records, key=lambda r: r.peak, reverse=True):
+        lines.append(
+            f"{record.source} [{record.stage}]: "
+            f"peak {record.peak / 1024:.1f} KiB, "
+            f"retained {record.retained / 1024:.1f} KiB"
+        )
+    return lines
@@ -0,0 +1,144 @@
+"""Cache of rendered yMMSL documentation, shareable between builds as a bundle file.
+
+Rendered documentation is keyed by a hash of everything that determines it: the name
+and contents of the yMMSL file, the versions of sphinx-ymmsl and ymmsl, the template
+overrides and the rendering options. A bundle file with rendered entries can be
+exported at the end of a build and imported at the start of another one, e.g. on a
+different CI runner, so that unchanged yMMSL files do not have to be loaded and rendered
+again.
+"""
+
+import gzip
+import hashlib
+import importlib.metadata
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from .search import ENTITY_KINDS
+
+# Version of the bundle file format
+BUNDLE_FORMAT = 1
+
+
+@dataclass(frozen=True)
+class RenderedYmmsl:
+    """
+    Documentation rendered for a yMMSL file.
+
+    markdown: The generated Markdown.
+    entities: The (kind, qualified name) of the models, components and ports.
+    """
+
+    markdown: str
+    entities: Tuple[Tuple[str, str], ...]
+
+
+def _versions() -> str:
+    return (
+        f"sphinx-ymmsl {importlib.metadata.version('sphinx_ymmsl')}, "
+        f"ymmsl {importlib.metadata.version('ymmsl')}"
+    )
+
+
+def render_key(
+    ymmsl_path: Path,
+    templates: Optional[Mapping[str, str]] = None,
+    options: Optional[Mapping[str, Any]] = None,
+) -> str:
+    """
+    Get the cache key of the documentation for a yMMSL file.
+
+    templates: The template overrides that are used for rendering.
+    options: Other options that affect rendering, with JSON serializable values.
+    """
+    digest = hashlib.sha256()
+    header = [
+        BUNDLE_FORMAT,
+        _versions(),
+        ymmsl_path.name,
+        sorted((templates or {}).items()),
+        sorted((options or {}).items()),
+    ]
+    digest.update(json.dumps(header).encode())
+    digest.update(b"\0")
+    digest.update(ymmsl_path.read_bytes())
+    return digest.hexdigest()
+
+
+def export_bundle(path: Path, entries: Mapping[str, RenderedYmmsl]) -> None:
+    """Write rendered entries to a compressed bundle file."""
+    bundle = {
+        "format": BUNDLE_FORMAT,
+        "versions": _versions(),
+        "entries": {
+            key: [entry.markdown, [list(e) for e in entry.entities]]
+            for key, entry in sorted(entries.items())
+        },
+    }
+    data = json.dumps(bundle, separators=(",", ":")).encode()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # mtime=0 makes the file reproducible for the same entries
+    path.write_bytes(gzip.compress(data, mtime=0))
+
+
+def import_bundle(path: Path) -> Tuple[Dict[str, RenderedYmmsl], int]:
+    """
+    Read rendered entries from a bundle file.
+
+    Entries that were made by other versions of sphinx-ymmsl or ymmsl, and entries that
+    are malformed, are dropped.
+
+    Returns:
+        The valid entries by key, and the number of entries that were dropped.
+
+    Raises:
+        OSError: If the file cannot be read.
+        ValueError: If the file is not a bundle in a supported format.
+    """
+    try:
+        bundle = json.loads(gzip.decompress(path.read_bytes()))
+    except (gzip.BadGzipFile, EOFError, UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError(f"{path} is not a yMMSL render cache bundle: {e}") from e
+
+    if not isinstance(bundle, dict) or bundle.get("format") != BUNDLE_FORMAT:
+        raise ValueError(f"{path} is not a yMMSL render cache bundle in a known format")
+
+    raw_entries = bundle.get("entries")
+    if not isinstance(raw_entries, dict):
+        raise ValueError(f"{path} is not a yMMSL render cache bundle: no entries")
+    if bundle.get("versions") != _versions():
+        return {}, len(raw_entries)
+
+    entries = {}
+    for key, raw_entry in raw_entries.items():
+        entry = _parse_entry(key, raw_entry)
+        if entry is not None:
+            entries[key] = entry
+    return entries, len(raw_entries) - len(entries)
+
+
+def _parse_entry(key: str, raw_entry: Any) -> Optional[RenderedYmmsl]:
+    """Validate an entry read from a bundle, returns None if it is malformed."""
+    if len(key) != 64 or any(c not in "0123456789abcdef" for c in key):
+        return None
+    if not isinstance(raw_entry, list) or len(raw_entry) != 2:
+        return None
+
+    markdown, raw_entities = raw_entry
+    if not isinstance(markdown, str) or not isinstance(raw_entities, list):
+        return None
+
+    entities = []
+    for raw_entity in raw_entities:
+        if (
+            not isinstance(raw_entity, list)
+            or len(raw_entity) != 2
+            or raw_entity[0] not in ENTITY_KINDS
+            or not isinstance(raw_entity[1], str)
+        ):
+            return None
+        entities.append((raw_entity[0], raw_entity[1]))
+
+    return RenderedYmmsl(markdown, tuple(entities))
@@ -0,0 +1,226 @@
+"""Control over the search index for generated yMMSL documentation.
+
+Sphinx indexes all text of a page for its full text search, which for yMMSL pages
+includes every row of the port and settings tables and every conduit. Generated
+sections can be kept out of that index. The names of models, components and ports are
+collected in a compact dedicated index instead, which HTML builds write to
+_static/ymmsl-entities.json for use by downstream tools.
+"""
+
+import json
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Collection, Dict, Iterable, Iterator, List, Tuple
+
+import ymmsl
+from docutils import nodes
+
+from .markdown_utilities import format_title
+
+# Generated sections that can be excluded from the search index. Ports, conduits,
+# settings and topology are identified by the ymmsl-<section> container class that the
+# templates add around them, "text" is all other generated text except titles.
+SEARCH_SECTIONS = ("ports", "conduits", "settings", "topology", "text")
+
+ENTITY_KINDS = ("model", "component", "port")
+
+# Level, title and id of a section
+_Section = Tuple[int, str, str]
+
+
+def exclude_from_search(
+    node_list: Iterable[nodes.Node], sections: Collection[str]
+) -> None:
+    """
+    Mark generated nodes of the given sections with the no-search class.
+
+    Titles of document sections are never excluded, so that models and components can
+    always be found by their names.
+    """
+    if not sections:
+        return
+
+    for node in node_list:
+        if isinstance(node, nodes.section):
+            exclude_from_search(node.children, sections)
+        elif isinstance(node, nodes.title) or not isinstance(node, nodes.Element):
+            continue
+        elif _section_of(node) in sections:
+            node["classes"].append("no-search")
+
+
+def _section_of(node: nodes.Element) -> str:
+    if isinstance(node, nodes.container):
+        for section in SEARCH_SECTIONS:
+            if f"ymmsl-{section}" in node["classes"]:
+                return section
+    return "text"
+
+
+@dataclass(frozen=True)
+class YmmslEntity:
+    """
+    A model, component or port that is documented on a page.
+
+    kind: "model", "component" or "port".
+    name: Fully qualified name, e.g. "model.component.port".
+    docname: Name of the document that documents the entity.
+    anchor: Id of the section that documents the entity, empty if not known.
+    """
+
+    kind: str
+    name: str
+    docname: str
+    anchor: str = ""
+
+    @property
+    def short_name(self) -> str:
+        """The name of the entity without the names of its model and component."""
+        return self.name.rsplit(".", 1)[-1]
+
+
+def configuration_entities(cfg: ymmsl.v0_2.Configuration) -> List[Tuple[str, str]]:
+    """
+    Get the (kind, qualified name) of the models, components and ports of a
+    configuration. Models and components come before their ports.
+    """
+    entities = []
+    for model_name, model_data in (cfg.models or {}).items():
+        entities.append(("model", str(model_name)))
+        for port_name in model_data.ports:
+            entities.append(("port", f"{model_name}.{port_name}"))
+
+        for comp_name, component in model_data.components.items():
+            entities.append(("component", f"{model_name}.{comp_name}"))
+            for port_name in component.ports:
+                entities.append(("port", f"{model_name}.{comp_name}.{port_name}"))
+
+    return entities
+
+
+# Section levels of the titles of models and components in the default templates
+_TITLE_LEVELS = {"model": 3, "component": 4}
+
+
+def _sections(node_list: Iterable[nodes.Node], level: int = 1) -> Iterator[_Section]:
+    """Get the (level, title, id) of all sections in node_list, in document order."""
+    for node in node_list:
+        if isinstance(node, nodes.section):
+            section_id = node["ids"][0] if node["ids"] else ""
+            yield level, node[0].astext(), section_id
+            yield from _sections(node.children, level + 1)
+        elif isinstance(node, nodes.Element):
+            yield from _sections(node.children, level)
+
+
+def collect_entities(
+    entities: Iterable[Tuple[str, str]], docname: str, node_list: Iterable[nodes.Node]
+) -> List[YmmslEntity]:
+    """
+    Create the entities of a document from (kind, qualified name) pairs, as returned by
+    configuration_entities().
+
+    Anchors are found by looking up the default titles of models and components among
+    the sections in node_list, at the section level of the default templates. Entities
+    and sections are both in document order, so each entity is looked up after the
+    section of the previous one, which gives components with the same name in
+    different models their own sections. Entities without a title of their own, like
+    ports, get the anchor of the model or component that they belong to.
+    """
+    sections = list(_sections(node_list))
+    position = 0
+
+    anchors: Dict[str, str] = {}
+    collected = []
+    for kind, name in entities:
+        parent, _, short_name = name.rpartition(".")
+        anchor = anchors.get(parent, "")
+        if kind != "port":
+            key = (_TITLE_LEVELS[kind], format_title(short_name))
+            for i in range(position, len(sections)):
+                if sections[i][:2] == key:
+                    anchor = sections[i][2]
+                    position = i + 1
+                    break
+            anchors[name] = anchor
+        collected.append(YmmslEntity(kind, name, docname, anchor))
+
+    return collected
+
+
+class EntityIndex:
+    """
+    Index of yMMSL entities that supports fast case-insensitive prefix lookups.
+
+    Entities can be looked up by the start of both their short and their fully qualified
+    name. The entities are kept sorted by qualified name, with a second ordering by
+    short name, so that each lookup is a binary search. The same orderings are written
+    by to_json(), so that lookup() is also the reference for consumers of the JSON.
+    """
+
+    def __init__(self, entities: Iterable[YmmslEntity]) -> None:
+        self._entities = sorted(entities, key=lambda e: (e.name.lower(), e.docname))
+        self._names = [entity.name.lower() for entity in self._entities]
+        self._short_order = sorted(
+            range(len(self._entities)),
+            key=lambda i: (self._entities[i].short_name.lower(), self._names[i]),
+        )
+        self._short_names = [
+            self._entities[i].short_name.lower() for i in self._short_order
+        ]
+
+    def __len__(self) -> int:
+        return len(self._entities)
+
+    def lookup(self, prefix: str) -> List[YmmslEntity]:
+        """Get the entities with a short or qualified name starting with prefix."""
+        prefix = prefix.lower()
+        found = [
+            self._entities[self._short_order[i]]
+            for i in _prefix_range(self._short_names, prefix)
+        ]
+        # Skip entities that were already found by their short name
+        found.extend(
+            self._entities[i]
+            for i in _prefix_range(self._names, prefix)
+            if not self._entities[i].short_name.lower().startswith(prefix)
+        )
+        return found
+
+    def to_json(self, uris: Dict[str, str]) -> str:
+        """
+        Serialize the index compactly as JSON.
+
+        The result contains:
+            - "kinds": The kinds of entities.
+            - "docs": The target URI of each document.
+            - "entities": A [kind, qualified name, doc, anchor] entry for each entity,
+              where kind and doc are positions in the arrays above. Entities are sorted
+              by lowercase qualified name, for binary searching.
+            - "short": Positions in "entities", sorted by lowercase short name.
+
+        uris: Target URI of each document.
+        """
+        kinds = sorted({entity.kind for entity in self._entities})
+        docs = sorted({entity.docname for entity in self._entities})
+        kind_pos = {kind: i for i, kind in enumerate(kinds)}
+        doc_pos = {docname: i for i, docname in enumerate(docs)}
+
+        index = {
+            "kinds": kinds,
+            "docs": [uris[docname] for docname in docs],
+            "entities": [
+                [kind_pos[e.kind], e.name, doc_pos[e.docname], e.anchor]
+                for e in self._entities
+            ],
+            "short": self._short_order,
+        }
+        return json.dumps(index, separators=(",", ":"))
+
+
+def _prefix_range(keys: List[str], prefix: str) -> range:
+    """Get the range of positions of the sorted keys that start with prefix."""
+    start = end = bisect_left(keys, prefix)
+    while end < len(keys) and keys[end].startswith(prefix):
+        end += 1
+    return range(start, end)
@@ -0,0 +1,399 @@
+"""Compilation of simple Jinja2 templates to plain Python functions.
+
+Rendering a template with Jinja2 has a fixed overhead for setting up its context, which
+is larger than the work needed for a small section like a ports table. Templates that
+only use output, if and for statements, attribute and item access, operators and a few
+filters are therefore compiled to a Python function that renders them directly. This
+covers all default templates and most overrides. Other templates are rendered by
+Jinja2 as usual.
+
+The compiled functions give the same output as Jinja2 for environments without
+autoescaping. Like with Jinja2's StrictUndefined, using a variable or attribute that is
+not defined raises a jinja2.UndefinedError.
+"""
+
+import keyword
+from itertools import count
+from typing import Any, Callable, Dict, List, Optional
+
+import jinja2
+from jinja2 import nodes
+
+# Jinja2 operators of binary and comparison expressions, with their Python equivalents
+_BINARY_OPERATORS = {
+    nodes.Add: "+",
+    nodes.Sub: "-",
+    nodes.Mul: "*",
+    nodes.Div: "/",
+    nodes.FloorDiv: "//",
+    nodes.Mod: "%",
+    nodes.Pow: "**",
+    nodes.And: "and",
+    nodes.Or: "or",
+}
+_COMPARE_OPERATORS = {
+    "eq": "==",
+    "ne": "!=",
+    "gt": ">",
+    "gteq": ">=",
+    "lt": "<",
+    "lteq": "<=",
+    "in": "in",
+    "notin": "not in",
+}
+
+# Filters that only take their value and arguments, called as they are
+_PLAIN_FILTERS = ("capitalize", "default", "lower", "title", "trim", "upper")
+
+# Variables that Jinja2 defines in some templates
+_SPECIAL_NAMES = ("caller", "kwargs", "self", "super", "varargs")
+
+# Attributes of the Jinja2 loop variable, as expressions of the index and length
+_LOOP_ATTRIBUTES = {
+    "index0": "{i}",
+    "index": "({i} + 1)",
+    "revindex0": "({n} - {i} - 1)",
+    "revindex": "({n} - {i})",
+    "first": "({i} == 0)",
+    "last": "({i} == {n} - 1)",
+    "length": "{n}",
+}
+
+
+# Prefix of the names in the generated code that are not template variables
+_PREFIX = "_t_"
+
+
+class _Unsupported(Exception):
+    """A template uses something that is not compiled, so Jinja2 renders it."""
+
+
+class _Compiler:
+    """
+    Generates the source code of a render function for a parsed template.
+
+    Template variables become keyword-only parameters of the function, which default to
+    an undefined value. Output that does not need loop variables is generated as a
+    single string expression, other output is appended to a list of parts. All other
+    names in the generated code start with _PREFIX.
+    """
+
+    def __init__(self, environment: jinja2.Environment) -> None:
+        self.environment = environment
+        self.namespace: Dict[str, Any] = {
+            "_t_getattr": environment.getattr,
+            "_t_getitem": environment.getitem,
+            "_t_str": str,
+            "_t_len": len,
+            "_t_map": map,
+            "_t_list": list,
+            "_t_enumerate": enumerate,
+        }
+        # Default values of the template variables, by name
+        self.parameters: Dict[str, str] = {}
+        self.ids = count()
+
+    def compile(self, template: nodes.Template) -> Callable[..., str]:
+        pieces = self.pieces(template.body, {})
+        if pieces is not None:
+            body = [f"    return {_concatenate(pieces)}"]
+        else:
+            body = ["    _t_parts = []", "    _t_append = _t_parts.append"]
+            self.statements(template.body, {}, body, 1)
+            body.append("    return ''.join(_t_parts)")
+
+        parameters = [f"{name}={value}" for name, value in self.parameters.items()]
+        if parameters:
+            parameters.insert(0, "*")
+        signature = ", ".join([*parameters, "**_t_context"])
+        exec("\n".join([f"def _t_render({signature}):", *body]), self.namespace)
+        return self.namespace["_t_render"]
+
+    def identifier(self, name: str) -> str:
+        return f"{_PREFIX}{name}{next(self.ids)}"
+
+    def constant(self, value: Any) -> str:
+        if value is None or isinstance(value, (bool, int)):
+            return repr(value)
+        # Strings are kept out of the generated code, so that it can put expressions
+        # in f-strings without having to escape them
+        identifier = self.identifier("k")
+        self.namespace[identifier] = value
+        return identifier
+
+    def pieces(
+        self, body: List[nodes.Node], scope: Dict[str, str]
+    ) -> Optional[List[str]]:
+        """
+        Get expressions for the output of statements, to be concatenated, or None if
+        they can only be rendered by statements.
+        """
+        pieces: List[str] = []
+        for node in body:
+            if isinstance(node, nodes.Output):
+                pieces.extend(self.output(node, scope))
+                continue
+            if isinstance(node, nodes.If):
+                expression = self.if_expression(node, scope)
+            elif isinstance(node, nodes.For):
+                expression = self.for_expression(node, scope)
+            else:
+                raise _Unsupported(type(node).__name__)
+            if expression is None:
+                return None
+            pieces.append(expression)
+        return pieces
+
+    def output(self, node: nodes.Output, scope: Dict[str, str]) -> List[str]:
+        pieces = []
+        for child in node.nodes:
+            if isinstance(child, nodes.TemplateData):
+                text = child.data.replace("{", "{{").replace("}", "}}")
+                pieces.append(f"f{text!r}")
+            else:
+                pieces.append(f"f'{{({self.expression(child, scope)})!s}}'")
+        return pieces
+
+    def if_expression(self, node: nodes.If, scope: Dict[str, str]) -> Optional[str]:
+        pieces = self.pieces(node.else_, scope)
+        if pieces is None:
+            return None
+        expression = _concatenate(pieces)
+        branches = [(node.test, node.body)]
+        branches.extend((elif_node.test, elif_node.body) for elif_node in node.elif_)
+        for test, body in reversed(branches):
+            pieces = self.pieces(body, scope)
+            if pieces is None:
+                return None
+            test_expression = self.expression(test, scope)
+            expression = (
+                f"({_concatenate(pieces)} if {test_expression} else {expression})"
+            )
+        return expression
+
+    def for_expression(self, node: nodes.For, scope: Dict[str, str]) -> Optional[str]:
+        if node.test is not None or node.recursive:
+            raise _Unsupported("for statement with a test or recursion")
+        if node.else_ or _uses_loop(node):
+            return None
+
+        inner = dict(scope)
+        target = self.target(node.target, inner)
+        pieces = self.pieces(node.body, inner)
+        if pieces is None:
+            return None
+        iterable = self.expression(node.iter, scope)
+        return f"''.join([{_concatenate(pieces)} for {target} in {iterable}])"
+
+    def statements(
+        self,
+        body: List[nodes.Node],
+        scope: Dict[str, str],
+        lines: List[str],
+        depth: int,
+    ) -> None:
+        indent = "    " * depth
+        start = len(lines)
+        output: List[str] = []
+        for node in body:
+            pieces = self.pieces([node], scope)
+            if pieces is not None:
+                output.extend(pieces)
+                continue
+            if output:
+                lines.append(f"{indent}_t_append({_concatenate(output)})")
+                output = []
+            if isinstance(node, nodes.If):
+                self.if_statement(node, scope, lines, depth)
+            else:
+                self.for_statement(node, scope, lines, depth)
+        if output:
+            lines.append(f"{indent}_t_append({_concatenate(output)})")
+        if len(lines) == start:
+            lines.append(f"{indent}pass")
+
+    def if_statement(
+        self, node: nodes.If, scope: Dict[str, str], lines: List[str], depth: int
+    ) -> None:
+        indent = "    " * depth
+        lines.append(f"{indent}if {self.expression(node.test, scope)}:")
+        self.statements(node.body, scope, lines, depth + 1)
+        for elif_node in node.elif_:
+            lines.append(f"{indent}elif {self.expression(elif_node.test, scope)}:")
+            self.statements(elif_node.body, scope, lines, depth + 1)
+        if node.else_:
+            lines.append(f"{indent}else:")
+            self.statements(node.else_, scope, lines, depth + 1)
+
+    def for_statement(
+        self, node: nodes.For, scope: Dict[str, str], lines: List[str], depth: int
+    ) -> None:
+        indent = "    " * depth
+        inner = dict(scope)
+        target = self.target(node.target, inner)
+        iterable = self.expression(node.iter, scope)
+        sequence, index, length = (self.identifier(name) for name in "sin")
+        inner["loop"] = f"{index},{length}"
+        lines.append(f"{indent}{sequence} = _t_list({iterable})")
+        lines.append(f"{indent}{length} = _t_len({sequence})")
+        loop = f"for {index}, {target} in _t_enumerate({sequence})"
+        pieces = self.pieces(node.body, inner)
+        if pieces is not None:
+            lines.append(f"{indent}_t_append(''.join([{_concatenate(pieces)} {loop}]))")
+        else:
+            lines.append(f"{indent}{loop}:")
+            self.statements(node.body, inner, lines, depth + 1)
+        if node.else_:
+            lines.append(f"{indent}if not {sequence}:")
+            self.statements(node.else_, scope, lines, depth + 1)
+
+    def target(self, node: nodes.Node, scope: Dict[str, str]) -> str:
+        if isinstance(node, nodes.Name):
+            self.check_name(node.name)
+            scope[node.name] = self.identifier(f"l_{node.name}_")
+            return scope[node.name]
+        if isinstance(node, nodes.Tuple):
+            items = [self.target(item, scope) for item in node.items]
+            return f"({', '.join(items)},)"
+        raise _Unsupported(type(node).__name__)
+
+    def expression(self, node: nodes.Node, scope: Dict[str, str]) -> str:
+        if isinstance(node, nodes.Name):
+            return self.name(node.name, scope)
+        if isinstance(node, nodes.Const):
+            return self.constant(node.value)
+        if isinstance(node, nodes.Getattr):
+            loop = self.loop_attribute(node, scope)
+            if loop is not None:
+                return loop
+            value = self.expression(node.node, scope)
+            return f"_t_getattr({value}, {self.constant(node.attr)})"
+        if isinstance(node, nodes.Getitem) and not isinstance(node.arg, nodes.Slice):
+            value = self.expression(node.node, scope)
+            return f"_t_getitem({value}, {self.expression(node.arg, scope)})"
+        if isinstance(node, nodes.Filter):
+            return self.filter(node, scope)
+        if isinstance(node, nodes.Not):
+            return f"(not {self.expression(node.node, scope)})"
+        if isinstance(node, nodes.Neg):
+            return f"(-{self.expression(node.node, scope)})"
+        if type(node) in _BINARY_OPERATORS:
+            left = self.expression(node.left, scope)
+            right = self.expression(node.right, scope)
+            return f"({left} {_BINARY_OPERATORS[type(node)]} {right})"
+        if isinstance(node, nodes.Concat):
+            items = [self.expression(item, scope) for item in node.nodes]
+            return f"_t_str().join(_t_map(_t_str, ({', '.join(items)},)))"
+        if isinstance(node, nodes.Compare):
+            parts = [self.expression(node.expr, scope)]
+            for operand in node.ops:
+                parts.append(_COMPARE_OPERATORS[operand.op])
+                parts.append(self.expression(operand.expr, scope))
+            return f"({' '.join(parts)})"
+        if isinstance(node, nodes.CondExpr) and node.expr2 is not None:
+            test = self.expression(node.test, scope)
+            if_true = self.expression(node.expr1, scope)
+            if_false = self.expression(node.expr2, scope)
+            return f"({if_true} if {test} else {if_false})"
+        raise _Unsupported(type(node).__name__)
+
+    def check_name(self, name: str) -> None:
+        if (
+            keyword.iskeyword(name)
+            or name.startswith(_PREFIX)
+            or name in self.environment.globals
+            or name in _SPECIAL_NAMES
+        ):
+            raise _Unsupported(f"variable {name}")
+
+    def name(self, name: str, scope: Dict[str, str]) -> str:
+        if name == "loop":
+            raise _Unsupported("loop variable used on its own")
+        if name in scope:
+            return scope[name]
+        if name not in self.parameters:
+            self.check_name(name)
+            self.parameters[name] = self.identifier("u")
+            self.namespace[self.parameters[name]] = self.environment.undefined(
+                name=name
+            )
+        return name
+
+    def loop_attribute(
+        self, node: nodes.Getattr, scope: Dict[str, str]
+    ) -> Optional[str]:
+        if not isinstance(node.node, nodes.Name) or node.node.name != "loop":
+            return None
+        if "loop" not in scope or node.attr not in _LOOP_ATTRIBUTES:
+            raise _Unsupported(f"loop.{node.attr}")
+        index, length = scope["loop"].split(",")
+        return _LOOP_ATTRIBUTES[node.attr].format(i=index, n=length)
+
+    def filter(self, node: nodes.Filter, scope: Dict[str, str]) -> str:
+        if (
+            node.dyn_args is not None
+            or node.dyn_kwargs is not None
+            or node.node is None
+        ):
+            raise _Unsupported("filter with dynamic arguments")
+
+        value = self.expression(node.node, scope)
+        args = [self.expression(arg, scope) for arg in node.args]
+        if node.name in ("length", "count") and not args and not node.kwargs:
+            return f"_t_len({value})"
+        if node.name == "join" and len(args) <= 1 and not node.kwargs:
+            if not args:
+                separator = "_t_str()"
+            elif isinstance(node.args[0], nodes.Const):
+                separator = self.constant(str(node.args[0].value))
+            else:
+                separator = f"_t_str({args[0]})"
+            return f"{separator}.join(_t_map(_t_str, {value}))"
+        if node.name in _PLAIN_FILTERS:
+            function = self.constant(self.environment.filters[node.name])
+            args.extend(
+                f"{kwarg.key}={self.expression(kwarg.value, scope)}"
+                for kwarg in node.kwargs
+            )
+            return f"{function}({', '.join([value, *args])})"
+        raise _Unsupported(f"filter {node.name}")
+
+
+def _uses_loop(node: nodes.For) -> bool:
+    """Whether the loop variable is used in a for statement, or in a nested one."""
+    return any(name.name == "loop" for name in node.find_all(nodes.Name))
+
+
+def _concatenate(pieces: List[str]) -> str:
+    """
+    Get an expression that concatenates string expressions, of which f-strings are
+    concatenated implicitly.
+    """
+    groups: List[List[str]] = []
+    for piece in pieces:
+        is_literal = piece.startswith(("f'", 'f"'))
+        if is_literal and groups and groups[-1][0].startswith(("f'", 'f"')):
+            groups[-1].append(piece)
+        else:
+            groups.append([piece])
+    return " + ".join(" ".join(group) for group in groups) or "''"
+
+
+def compile_template(
+    environment: jinja2.Environment, source: str
+) -> Optional[Callable[..., str]]:
+    """
+    Compile a template to a Python function that renders it from keyword arguments.
+
+    Returns None if the template uses something that cannot be compiled, in which case
+    it should be rendered by Jinja2.
+
+    Raises:
+        jinja2.TemplateSyntaxError: If the source is not a valid template.
+    """
+    if environment.autoescape:
+        return None
+    try:
+        return _Compiler(environment).compile(environment.parse(source))
+    except _Unsupported:
+        return None
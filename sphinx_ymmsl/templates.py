@@ -0,0 +1,189 @@
+"""Jinja2 templates that define the layout of the generated Markdown documentation.
+
+Every section of the documentation is rendered by its own template. The default
+templates can be overridden per section with the ``ymmsl_templates`` option in conf.py.
+
+The ports, conduits, settings and topology statistics are wrapped in containers with a
+ymmsl-<section> class, which can be used for styling and to keep them out of the search
+index.
+
+Rendering a Jinja2 template has a fixed overhead that is larger than the work needed
+for a small section like a ports table. Templates are therefore compiled to plain
+Python functions where possible, see template_compiler.py, which is the case for all
+default templates.
+"""
+
+from functools import lru_cache
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+
+import jinja2
+
+from .template_compiler import compile_template
+
+DEFAULT_TEMPLATES: Dict[str, str] = {
+    # Context: title, name, description, filename, version, models
+    "document": """\
+# {{ title }}
+{% if description %}
+{{ description }}
+
+{% endif %}
+**Model file**: `{{ filename }}`
+
+{% if version %}
+**yMMSL version**: `{{ version }}`
+{% endif %}
+
+{{ models }}""",
+    # Context: models (list of rendered model sections)
+    "models": """\
+## Models
+
+{{ models|join("\n") }}""",
+    # Context: title, name, description, ports, components, conduits, settings,
+    # topology (empty unless enabled with ymmsl_topology)
+    "model": """\
+### {{ title }}
+{% if description %}
+{{ description }}
+
+{% endif %}
+{{ ports }}{{ components }}{{ conduits }}{{ settings }}{{ topology }}""",
+    # Context: title, name, description, ports, implementation, multiplicity
+    "component": """\
+#### {{ title }}
+{% if description %}
+{{ description }}
+
+{% endif %}
+{{ ports }}{% if implementation %}
+**Implementation**: `{{ implementation }}`
+
+{% endif %}
+{% if multiplicity %}
+**Multiplicity**: `{{ multiplicity }}`
+
+{% endif %}""",
+    # Context: headers, rows (list of lists of strings)
+    "table": """\
+| {{ headers|join(" | ") }} |
+| {% for header in headers %}{{ "-" * header|length }}\
+{% if not loop.last %} | {% endif %}{% endfor %} |
+{% for row in rows %}
+| {{ row|join(" | ") }} |
+{% endfor %}""",
+    # Context: header_level (may be None), header_text, table
+    "ports": """\
+{% if header_level %}
+{{ "#" * header_level }} {{ header_text }}
+{% endif %}
+```{container} ymmsl-ports
+{{ table }}
+```
+
+""",
+    # Context: header_level, conduits
+    "conduits": """\
+{{ "#" * header_level }} Conduits
+```{container} ymmsl-conduits
+{% for conduit in conduits %}
+* {{ conduit.sender }}: {{ conduit.receiver }}
+{% endfor %}
+```
+
+""",
+    # Context: table
+    "settings": """\
+#### Supported Settings
+```{container} ymmsl-settings
+{{ table }}
+
+For more information about the types: \
+[yMMSL documentation](https://ymmsl-python.readthedocs.io/en/develop/index.html).
+```
+
+""",
+    # Context: topology (a ModelTopology), connected (table of the conduits of the
+    # coupled components, most connected first, may be empty), ports (table of ports
+    # by operator, may be empty)
+    "topology": """\
+#### Coupling Topology
+```{container} ymmsl-topology
+**Components**: {{ topology.components|length }}, \
+**Conduits**: {{ topology.num_conduits }}
+
+{% if connected %}
+{{ connected }}
+
+{% endif %}
+{% if topology.isolated %}
+**Isolated components**: `{{ topology.isolated|join("`, `") }}`
+
+{% endif %}
+{% if ports %}
+{{ ports }}
+{% endif %}
+```
+
+""",
+}
+
+
+class MarkdownTemplates:
+    """
+    Compiled templates for all sections of the documentation.
+
+    Create instances with get_templates(), which caches them so that templates are
+    compiled only once and shared by all directives.
+
+    Raises:
+        ValueError: If an override is given for an unknown section.
+        jinja2.TemplateSyntaxError: If an override is not a valid Jinja2 template.
+    """
+
+    def __init__(
+        self,
+        overrides: Optional[Mapping[str, str]] = None,
+        compiled: bool = True,
+    ) -> None:
+        """
+        overrides: Template sources by section name, replacing the default templates.
+        compiled: Compile templates to Python functions where possible. If False, all
+                  templates are rendered with Jinja2, which is used for testing.
+        """
+        overrides = dict(overrides or {})
+        unknown = sorted(set(overrides) - set(DEFAULT_TEMPLATES))
+        if unknown:
+            raise ValueError(
+                f"Unknown yMMSL template(s): {', '.join(unknown)}. "
+                f"Available templates: {', '.join(DEFAULT_TEMPLATES)}"
+            )
+        env = jinja2.Environment(
+            autoescape=False,
+            keep_trailing_newline=True,
+            trim_blocks=True,
+            undefined=jinja2.StrictUndefined,
+        )
+        self._renderers: Dict[str, Callable[..., str]] = {}
+        for section, source in {**DEFAULT_TEMPLATES, **overrides}.items():
+            render = compile_template(env, source) if compiled else None
+            self._renderers[section] = render or env.from_string(source).render
+
+    def render(self, section: str, **context: Any) -> str:
+        """Render the template of a section of the documentation."""
+        return self._renderers[section](**context)
+
+
+@lru_cache(maxsize=None)
+def _cached_templates(overrides: Tuple[Tuple[str, str], ...]) -> MarkdownTemplates:
+    return MarkdownTemplates(dict(overrides))
+
+
+def get_templates(overrides: Optional[Mapping[str, str]] = None) -> MarkdownTemplates:
+    """
+    Get the compiled templates, where overrides replace the default templates.
+
+    Templates are compiled on first use and cached for later calls with the same
+    overrides.
+    """
+    return _cached_templates(tuple(sorted((overrides or {}).items())))
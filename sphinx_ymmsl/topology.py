@@ -0,0 +1,111 @@
+"""Coupling topology statistics of yMMSL models.
+
+The statistics of a model are computed from an adjacency index of its components, which
+is built in a single pass over the components and the conduits of the model. All
+statistics are derived from that index in linear time in the size of the model.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import ymmsl
+
+
+@dataclass(frozen=True)
+class ComponentTopology:
+    """
+    How a component is coupled to the rest of its model.
+
+    name: Name of the component.
+    fan_in: Number of conduits that the component receives on.
+    fan_out: Number of conduits that the component sends on.
+    """
+
+    name: str
+    fan_in: int
+    fan_out: int
+
+    @property
+    def conduits(self) -> int:
+        """The number of conduits that the component sends or receives on."""
+        return self.fan_in + self.fan_out
+
+
+@dataclass(frozen=True)
+class ModelTopology:
+    """
+    Coupling topology statistics of a model.
+
+    components: The topology of each component, in the order of the model.
+    num_conduits: Total number of conduits of the model.
+    ports_by_operator: Number of ports of the model and its components by operator
+                       name, for the operators that have ports, in the order of the
+                       submodel execution loop.
+    """
+
+    components: Tuple[ComponentTopology, ...]
+    num_conduits: int
+    ports_by_operator: Dict[str, int]
+
+    @property
+    def isolated(self) -> List[str]:
+        """The names of the components that are not coupled to anything."""
+        return [c.name for c in self.components if c.conduits == 0]
+
+    def most_connected(self, count: Optional[int] = None) -> List[ComponentTopology]:
+        """
+        Get the components with the most conduits, most connected first.
+
+        count: The maximum number of components to return, all if None.
+
+        Components without any conduits are not included. Ties are kept in model order.
+        """
+        # Bucket sort by number of conduits, which is at most twice the number of
+        # conduits of the model, so this takes linear time
+        buckets: List[List[ComponentTopology]] = [
+            [] for _ in range(2 * self.num_conduits + 1)
+        ]
+        for component in self.components:
+            buckets[component.conduits].append(component)
+        connected = [c for bucket in reversed(buckets[1:]) for c in bucket]
+        return connected if count is None else connected[:count]
+
+
+def model_topology(model_data) -> ModelTopology:
+    """
+    Compute the coupling topology statistics of a model.
+
+    Conduits that are connected to a port of the model itself, rather than to one of
+    its components, count towards the number of conduits of the model only.
+    """
+    # Adjacency index: [fan in, fan out] by component name
+    adjacency: Dict[str, List[int]] = {
+        str(name): [0, 0] for name in model_data.components
+    }
+    for conduit in model_data.conduits:
+        receiver = adjacency.get(str(conduit.receiving_component()))
+        if receiver is not None:
+            receiver[0] += 1
+        sender = adjacency.get(str(conduit.sending_component()))
+        if sender is not None:
+            sender[1] += 1
+
+    operator_counts: Dict[ymmsl.v0_2.Operator, int] = {}
+    all_ports = [model_data.ports]
+    all_ports.extend(component.ports for component in model_data.components.values())
+    for ports in all_ports:
+        for port_name in ports:
+            operator = ports[port_name].operator
+            operator_counts[operator] = operator_counts.get(operator, 0) + 1
+
+    return ModelTopology(
+        components=tuple(
+            ComponentTopology(name, fan_in, fan_out)
+            for name, (fan_in, fan_out) in adjacency.items()
+        ),
+        num_conduits=len(model_data.conduits),
+        ports_by_operator={
+            operator.name: operator_counts[operator]
+            for operator in sorted(operator_counts, key=lambda op: op.value)
+        },
+    )
@@ -0,0 +1,73 @@
+"""Registry of loaders and renderers for the supported yMMSL versions.
+
+The version of a yMMSL file is sniffed from the start of the file, see
+extract_version_from_file(), so that files in an unsupported version can be rejected
+before they are parsed. Only if no version is found there, the whole file is loaded to
+find it, see load_version().
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .search import configuration_entities
+from .ymmsl_to_markdown import configuration_markdown, load_configuration
+
+
+@dataclass(frozen=True)
+class YmmslVersion:
+    """
+    How to load and document yMMSL files of a version.
+
+    load: Load the configuration from a yMMSL file.
+    render: Generate the Markdown documentation for a loaded configuration, given the
+            path of the yMMSL file, the configuration and the templates to use. The
+            keyword arguments topology and topology_limit select whether and how to
+            include coupling topology statistics, and version is the version found
+            at the start of the file.
+    entities: Get the (kind, qualified name) of the models, components and ports of a
+              loaded configuration.
+    """
+
+    load: Callable[[Path], Any]
+    render: Callable[..., str]
+    entities: Callable[[Any], List[Tuple[str, str]]]
+
+
+class UnsupportedYmmslVersion(ValueError):
+    """The version of a yMMSL file is missing or not supported."""
+
+
+# ymmsl converts v0.1 files to v0.2 while loading them, so both are documented as v0.2
+_V0_2 = YmmslVersion(load_configuration, configuration_markdown, configuration_entities)
+
+YMMSL_VERSIONS: Dict[str, YmmslVersion] = {
+    "v0.1": _V0_2,
+    "v0.2": _V0_2,
+}
+
+
+def register_ymmsl_version(version: str, handler: YmmslVersion) -> None:
+    """
+    Register how to load and document yMMSL files of a version.
+
+    An existing registration for the version is replaced.
+    """
+    YMMSL_VERSIONS[version] = handler
+
+
+def get_ymmsl_version(version: Optional[str]) -> YmmslVersion:
+    """
+    Get the registered handler for a yMMSL version.
+
+    Raises:
+        UnsupportedYmmslVersion: If the version is None or not registered.
+    """
+    if version is None:
+        raise UnsupportedYmmslVersion("no ymmsl_version found in the file")
+    if version not in YMMSL_VERSIONS:
+        raise UnsupportedYmmslVersion(
+            f"unsupported ymmsl_version {version}, "
+            f"supported versions are {', '.join(sorted(YMMSL_VERSIONS))}"
+        )
+    return YMMSL_VERSIONS[version]
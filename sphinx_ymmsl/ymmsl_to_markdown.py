@@ -1,5 +1,6 @@
 """Generation of a markdown file based on a yMMSL file."""
 
+import re
 from pathlib import Path
 from typing import List, Optional
 
@@ -8,14 +9,53 @@ import ymmsl
 from .markdown_utilities import (
     demote_markdown_headers,
     format_title,
-    markdown_table,
+    render_table,
 )
+from .templates import MarkdownTemplates, get_templates
+from .topology import model_topology
+
+# Number of bytes at the start of a yMMSL file that are searched for its version
+VERSION_SNIFF_BYTES = 8192
+
+# A top-level ymmsl_version line, of which the key may be quoted
+_VERSION_LINE = re.compile(r"""^(["']?)ymmsl_version\1\s*:(.*)$""")
+
+# The _render_*() functions below return Markdown text in which every line, including
+# the last one, ends with a newline, so that sections can simply be concatenated. The
+# public *_markdown() functions return the same text as a list of lines.
+
+
+def _lines(text: str) -> List[str]:
+    """Split Markdown text with newline-terminated lines into a list of lines."""
+    return text[:-1].split("\n") if text else []
+
+
+_PORTS_HEADERS = ["Operator", "Port Name"]
+
+
+def _render_ports(
+    ports: dict,
+    header_level: Optional[int],
+    header_text: Optional[str],
+    templates: MarkdownTemplates,
+) -> str:
+    if not ports:
+        return ""
+
+    rows = [(ports[port_name].operator.name, str(port_name)) for port_name in ports]
+    return templates.render(
+        "ports",
+        header_level=header_level,
+        header_text=header_text,
+        table=render_table(_PORTS_HEADERS, rows, templates),
+    )
 
 
 def ports_markdown(
     ports: dict,
     header_level: Optional[int] = None,
     header_text: Optional[str] = None,
+    templates: Optional[MarkdownTemplates] = None,
 ) -> List[str]:
     """
     Generate Markdown lines for model or component ports.
@@ -23,94 +63,149 @@ def ports_markdown(
     ports: Dictionary of port names to port objects.
     Optional: header level with header text.
     """
-    if not ports:
-        return []
+    templates = templates or get_templates()
+    return _lines(_render_ports(ports, header_level, header_text, templates))
 
-    markdown_lines = []
-    if header_level:
-        markdown_lines.append(f"{'#' * header_level} {header_text}")
 
-    headers = ["Operator", "Port Name"]
-    rows = [(ports[port_name].operator.name, port_name) for port_name in ports]
-    markdown_lines.extend([markdown_table(headers, rows), ""])
-    return markdown_lines
+def _render_conduits(
+    conduits: list, header_level: int, templates: MarkdownTemplates
+) -> str:
+    if not conduits:
+        return ""
+    return templates.render("conduits", header_level=header_level, conduits=conduits)
 
 
-def conduits_markdown(conduits: list, header_level: int = 4) -> List[str]:
+def conduits_markdown(
+    conduits: list,
+    header_level: int = 4,
+    templates: Optional[MarkdownTemplates] = None,
+) -> List[str]:
     """
     Generate Markdown lines for conduits.
     """
-    if not conduits:
-        return []
+    templates = templates or get_templates()
+    return _lines(_render_conduits(conduits, header_level, templates))
 
-    markdown_lines = [f"{'#' * header_level} Conduits"]
-    for conduit in conduits:
-        markdown_lines.append(f"* {conduit.sender}: {conduit.receiver}")
-    markdown_lines.append("")
-    return markdown_lines
+
+def _render_component(comp_name: str, component, templates: MarkdownTemplates) -> str:
+    description = None
+    if component.description:
+        description = demote_markdown_headers(component.description.strip(), level=4)
+
+    return templates.render(
+        "component",
+        name=comp_name,
+        title=format_title(comp_name),
+        description=description,
+        ports=_render_ports(component.ports, None, None, templates),
+        implementation=component.implementation,
+        multiplicity=component.multiplicity,
+    )
 
 
-def component_markdown(comp_name: str, component) -> List[str]:
+def component_markdown(
+    comp_name: str, component, templates: Optional[MarkdownTemplates] = None
+) -> List[str]:
     """
     Generate Markdown lines for a single component.
     """
-    markdown_lines = [f"#### {format_title(comp_name)}"]
+    templates = templates or get_templates()
+    return _lines(_render_component(comp_name, component, templates))
 
-    if component.description:
-        comp_desc = demote_markdown_headers(component.description.strip(), level=4)
-        markdown_lines.extend([comp_desc, ""])
 
-    markdown_lines.extend(ports_markdown(component.ports))
-    if component.implementation:
-        markdown_lines.extend([f"**Implementation**: `{component.implementation}`", ""])
-    if component.multiplicity:
-        markdown_lines.extend([f"**Multiplicity**: `{component.multiplicity}`", ""])
-
-    return markdown_lines
+def _render_components(components: dict, templates: MarkdownTemplates) -> str:
+    return "".join(
+        _render_component(comp_name, component, templates)
+        for comp_name, component in components.items()
+    )
 
 
-def components_markdown(components: dict) -> List[str]:
+def components_markdown(
+    components: dict, templates: Optional[MarkdownTemplates] = None
+) -> List[str]:
     """
     Generate Markdown lines for all components, where the markdown for each component is
     generated by generate_component_markdown().
     """
-    if not components:
-        return []
+    templates = templates or get_templates()
+    return _lines(_render_components(components, templates))
 
-    markdown_lines = []
-    for comp_name, component in components.items():
-        markdown_lines.extend(component_markdown(comp_name, component))
 
-    return markdown_lines
+def _render_supported_settings(
+    supported_settings: list, templates: MarkdownTemplates
+) -> str:
+    if not supported_settings:
+        return ""
+
+    headers = ["Parameter", "Type", "Description"]
+    rows = [
+        (str(param_name), str(setting.typ), setting.description or "")
+        for param_name, setting in supported_settings
+    ]
+    return templates.render("settings", table=render_table(headers, rows, templates))
 
 
-def generate_supported_settings_markdown(supported_settings: list) -> List[str]:
+def generate_supported_settings_markdown(
+    supported_settings: list, templates: Optional[MarkdownTemplates] = None
+) -> List[str]:
     """
     Generate Markdown lines for supported settings.
 
     Args:
         supported_settings: List of (parameter_name, setting) tuples.
+        templates: Templates to render with, the default templates if None.
 
     Returns:
         List of markdown lines representing the supported settings table.
     """
-    if not supported_settings:
-        return []
+    templates = templates or get_templates()
+    return _lines(_render_supported_settings(supported_settings, templates))
 
-    markdown_lines = ["#### Supported Settings"]
-    headers = ["Parameter", "Type", "Description"]
-    rows = [
-        (param_name, str(setting.typ), setting.description or "")
-        for param_name, setting in supported_settings
-    ]
-    markdown_lines.extend([markdown_table(headers, rows), ""])
 
-    markdown_lines.append(
-        "For more information about the types: [yMMSL documentation](https://ymmsl-python.readthedocs.io/en/develop/index.html)."
+_CONNECTED_HEADERS = ["Component", "Conduits", "Fan-in", "Fan-out"]
+_OPERATOR_HEADERS = ["Operator", "Ports"]
+
+
+def _render_topology(
+    model_data, templates: MarkdownTemplates, limit: Optional[int]
+) -> str:
+    if not model_data.components and not model_data.conduits:
+        return ""
+
+    topology = model_topology(model_data)
+    connected = ""
+    most_connected = topology.most_connected(limit)
+    if most_connected:
+        rows = [
+            (c.name, str(c.conduits), str(c.fan_in), str(c.fan_out))
+            for c in most_connected
+        ]
+        connected = render_table(_CONNECTED_HEADERS, rows, templates)
+    ports = ""
+    if topology.ports_by_operator:
+        rows = [(op, str(n)) for op, n in topology.ports_by_operator.items()]
+        ports = render_table(_OPERATOR_HEADERS, rows, templates)
+
+    return templates.render(
+        "topology", topology=topology, connected=connected, ports=ports
     )
-    markdown_lines.append("")
 
-    return markdown_lines
+
+def topology_markdown(
+    model_data,
+    templates: Optional[MarkdownTemplates] = None,
+    limit: Optional[int] = None,
+) -> List[str]:
+    """
+    Generate Markdown lines for the coupling topology statistics of a model: the
+    numbers of components and conduits, the conduits of each coupled component with
+    their fan-in and fan-out, the isolated components and the number of ports by
+    operator.
+
+    limit: Only list the conduits of this many most connected components, if given.
+    """
+    templates = templates or get_templates()
+    return _lines(_render_topology(model_data, templates, limit))
 
 
 def generate_header(
@@ -150,16 +245,46 @@ def generate_model_header(model_name: str, description: Optional[str]) -> List[s
     return generate_header(title, description, header_level=3)
 
 
-def extract_version_from_file(ymmsl_path: Path) -> Optional[str]:
+def extract_version_from_file(
+    ymmsl_path: Path, limit: int = VERSION_SNIFF_BYTES
+) -> Optional[str]:
     """
     Extract the yMMSL version from a yMMSL file.
+
+    Only the first limit bytes of the file are read, as the version is almost always at
+    the top. Returns None if no version is found there.
     """
-    for line in ymmsl_path.read_text().splitlines():
-        if line.startswith("ymmsl_version:"):
-            return line.split(":", 1)[1].strip()
+    with ymmsl_path.open("rb") as f:
+        head = f.read(limit + 1)
+    if len(head) > limit:
+        # Drop the last line, it may have been cut off
+        head = head[: head.rfind(b"\n", 0, limit) + 1]
+
+    # utf-8-sig removes a byte order mark at the start of the file
+    for line in head.decode("utf-8-sig", errors="replace").splitlines():
+        match = _VERSION_LINE.match(line)
+        if match:
+            version = match.group(2).split("#", 1)[0]
+            return version.strip().strip("'\"")
     return None
 
 
+def load_version(ymmsl_path: Path) -> Optional[str]:
+    """
+    Get the yMMSL version of a file by loading all of it.
+
+    This is much slower than extract_version_from_file(), but finds the version
+    wherever and however it is written. Returns None if the file cannot be loaded.
+    """
+    try:
+        document = ymmsl.load(ymmsl_path)
+    except RuntimeError:
+        # ymmsl raises a yatiml.RecognitionError for invalid files
+        return None
+    # The module of the document is e.g. ymmsl.v0_2.configuration
+    return type(document).__module__.split(".")[1].replace("_", ".")
+
+
 def generate_file_info(ymmsl_path: Path) -> List[str]:
     """
     Generate Markdown lines for file information: filename and yMMSL version.
@@ -174,7 +299,38 @@ def generate_file_info(ymmsl_path: Path) -> List[str]:
     return markdown_lines
 
 
-def model_markdown(cfg: ymmsl.v0_2.Configuration) -> str:
+def _render_model(
+    model_name: str,
+    model_data,
+    templates: MarkdownTemplates,
+    topology: bool,
+    topology_limit: Optional[int],
+) -> str:
+    description = None
+    if model_data.description:
+        description = demote_markdown_headers(model_data.description.strip(), level=3)
+
+    return templates.render(
+        "model",
+        name=model_name,
+        title=format_title(model_name),
+        description=description,
+        ports=_render_ports(model_data.ports, 3, "Model Ports", templates),
+        components=_render_components(model_data.components, templates),
+        conduits=_render_conduits(model_data.conduits, 4, templates),
+        settings=_render_supported_settings(model_data.supported_settings, templates),
+        topology=(
+            _render_topology(model_data, templates, topology_limit) if topology else ""
+        ),
+    )
+
+
+def model_markdown(
+    cfg: ymmsl.v0_2.Configuration,
+    templates: Optional[MarkdownTemplates] = None,
+    topology: bool = False,
+    topology_limit: Optional[int] = None,
+) -> str:
     """
     Generate Markdown documentation for models in a yMMSL configuration.
 
@@ -184,41 +340,76 @@ def model_markdown(cfg: ymmsl.v0_2.Configuration) -> str:
     - Components with their descriptions, ports presented in tables, implementation, and
       multiplicity.
     - A table of supported settings for each model.
+    - If topology is True, coupling topology statistics for each model, see
+      topology_markdown() for these and topology_limit.
     """
     if not cfg.models:
         return ""
 
-    markdown_lines = ["## Models", ""]
+    templates = templates or get_templates()
+    models = [
+        _render_model(model_name, model_data, templates, topology, topology_limit)
+        for model_name, model_data in cfg.models.items()
+    ]
+    return templates.render("models", models=models).removesuffix("\n")
 
-    for model_name, model_data in cfg.models.items():
-        markdown_lines.extend(generate_model_header(model_name, model_data.description))
-        markdown_lines.extend(
-            ports_markdown(model_data.ports, header_level=3, header_text="Model Ports")
-        )
-        markdown_lines.extend(components_markdown(model_data.components))
-        markdown_lines.extend(conduits_markdown(model_data.conduits))
-        markdown_lines.extend(
-            generate_supported_settings_markdown(model_data.supported_settings)
-        )
 
-    return "\n".join(markdown_lines)
+def load_configuration(ymmsl_path: Path) -> ymmsl.v0_2.Configuration:
+    """
+    Load the yMMSL configuration from a yMMSL file.
+    """
+    return ymmsl.load_as(ymmsl.v0_2.Configuration, ymmsl_path)
 
 
-def ymmsl_to_markdown(ymmsl_path: Path) -> str:
+def configuration_markdown(
+    ymmsl_path: Path,
+    cfg: ymmsl.v0_2.Configuration,
+    templates: Optional[MarkdownTemplates] = None,
+    topology: bool = False,
+    version: Optional[str] = None,
+    topology_limit: Optional[int] = None,
+) -> str:
     """
-    Generate complete Markdown documentation for a yMMSL file.
+    Generate complete Markdown documentation for an already loaded yMMSL configuration.
+
+    version: The yMMSL version of the file, if already known. Otherwise it is extracted
+             from the start of the file with extract_version_from_file().
 
     The documentation includes:
         - A title based on the yMMSL file name.
         - The configuration description, if available.
         - The yMMSL file name and version.
-        - Detailed model documentation defined by model_markdown_generation.
+        - Detailed model documentation defined by model_markdown_generation, with
+          coupling topology statistics if topology is True.
+
+    The layout of each section is defined by the templates, see templates.py.
     """
-    cfg = ymmsl.load_as(ymmsl.v0_2.Configuration, ymmsl_path)
+    templates = templates or get_templates()
+
+    description = None
+    if cfg.description:
+        description = demote_markdown_headers(cfg.description.strip(), level=1)
+
+    return templates.render(
+        "document",
+        name=ymmsl_path.stem,
+        title=f"yMMSL {format_title(ymmsl_path.stem)} Documentation",
+        description=description,
+        filename=ymmsl_path.name,
+        version=version or extract_version_from_file(ymmsl_path),
+        models=model_markdown(cfg, templates, topology, topology_limit),
+    )
 
-    markdown_lines = []
-    markdown_lines.extend(generate_document_header(ymmsl_path, cfg.description))
-    markdown_lines.extend(generate_file_info(ymmsl_path))
-    markdown_lines.append(model_markdown(cfg))
 
-    return "\n".join(markdown_lines)
+def ymmsl_to_markdown(
+    ymmsl_path: Path,
+    templates: Optional[MarkdownTemplates] = None,
+    topology: bool = False,
+) -> str:
+    """
+    Generate complete Markdown documentation for a yMMSL file.
+
+    See configuration_markdown() for the contents of the documentation.
+    """
+    cfg = load_configuration(ymmsl_path)
+    return configuration_markdown(ymmsl_path, cfg, templates, topology)
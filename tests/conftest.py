@@ -1,11 +1,13 @@
 """Shared pytest fixtures for sphinx-ymmsl tests."""
 
 import tempfile
+from io import StringIO
 from pathlib import Path
-from typing import Callable, Generator
+from typing import Any, Callable, Generator
 
 import pytest
 import ymmsl
+from sphinx.testing.util import SphinxTestApp
 
 
 @pytest.fixture
@@ -149,3 +151,88 @@ def load_ymmsl_config(
         return ymmsl.load_as(ymmsl.v0_2.Configuration, path)
 
     return _load_config
+
+
+@pytest.fixture
+def large_ymmsl() -> Callable[[int], str]:
+    """
+    Generate yMMSL content for a synthetic model with many components.
+
+    Each component has a description, four ports and is coupled to the next component
+    in a ring, and the model has one supported setting per component.
+    """
+
+    def _generate(num_components: int) -> str:
+        lines = [
+            "ymmsl_version: v0.2",
+            "",
+            "description: Synthetic large configuration",
+            "",
+            "models:",
+            "  large_model:",
+            "    description: A model with many components",
+            "    supported_settings:",
+        ]
+        lines.extend(
+            f"      setting_{i}: float  Setting number {i}"
+            for i in range(num_components)
+        )
+        lines.append("    components:")
+        for i in range(num_components):
+            lines.extend(
+                [
+                    f"      comp_{i}:",
+                    "        ports:",
+                    "          f_init: init_in",
+                    "          o_i: state_out",
+                    "          s: update_in",
+                    "          o_f: final_out",
+                    f"        description: Component number {i}",
+                    f"        implementation: comp_{i}_program",
+                ]
+            )
+        lines.append("    conduits:")
+        for i in range(num_components):
+            receiver = (i + 1) % num_components
+            lines.append(f"      comp_{i}.state_out: comp_{receiver}.init_in")
+        return "\n".join(lines) + "\n"
+
+    return _generate
+
+
+@pytest.fixture
+def build_sphinx(
+    tmp_path: Path,
+) -> Callable[..., SphinxTestApp]:
+    """
+    Build a Sphinx project containing an index page with a ymmsl directive.
+
+    The yMMSL content is written to model.ymmsl in the source directory. Additional
+    conf.py values can be passed as keyword arguments.
+    """
+
+    def _build(
+        ymmsl_content: str, buildername: str = "html", **confoverrides: Any
+    ) -> SphinxTestApp:
+        srcdir = tmp_path / "src"
+        srcdir.mkdir(exist_ok=True)
+        (srcdir / "conf.py").write_text('extensions = ["sphinx_ymmsl"]\n')
+        (srcdir / "index.rst").write_text(".. ymmsl:: model.ymmsl\n")
+        (srcdir / "model.ymmsl").write_text(ymmsl_content)
+
+        app = SphinxTestApp(
+            buildername,
+            srcdir=srcdir,
+            builddir=tmp_path / "build",
+            freshenv=True,
+            confoverrides=confoverrides,
+            status=StringIO(),
+            warning=StringIO(),
+        )
+        try:
+            app.build()
+        finally:
+            app.cleanup()
+        return app
+
+    return _build
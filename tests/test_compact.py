@@ -0,0 +1,125 @@
+"""Tests for compact module."""
+
+import pytest
+from docutils import nodes
+
+from sphinx_ymmsl.compact import unpack_nodes, ymmsl_markdown
+
+
+def doctree_size(app) -> int:
+    """Size of the pickled doctree of the index page."""
+    return (app.doctreedir / "index.doctree").stat().st_size
+
+
+class TestCompactDoctree:
+    """Tests for the ymmsl_compact_doctree configuration option."""
+
+    def test_same_html(self, build_sphinx, large_ymmsl):
+        """
+        Test that the compact doctree gives the same HTML and search index, in a
+        smaller doctree.
+        """
+        # Smart quotes are applied while reading, and should be kept
+        content = large_ymmsl(20).replace(
+            "A model with many components", 'A model with "many" components'
+        )
+        app = build_sphinx(content)
+        html = (app.outdir / "index.html").read_text()
+        search_index = (app.outdir / "searchindex.js").read_text()
+        entities = app.env.ymmsl_entities["index"]
+        size = doctree_size(app)
+
+        app = build_sphinx(content, ymmsl_compact_doctree=True)
+        assert (app.outdir / "index.html").read_text() == html
+        assert (app.outdir / "searchindex.js").read_text() == search_index
+        assert app.env.ymmsl_entities["index"] == entities
+        assert doctree_size(app) < size / 3
+
+    def test_doctree(self, build_sphinx, ymmsl_with_port):
+        """Test that the doctree holds the generated nodes, packed."""
+        app = build_sphinx(ymmsl_with_port, ymmsl_compact_doctree=True)
+        doctree = app.env.get_doctree("index")
+        (node,) = doctree.findall(ymmsl_markdown)
+        assert node["filename"] == "model.ymmsl"
+        assert not list(doctree.findall(nodes.table))
+
+        generated = unpack_nodes(node["nodes"], doctree)
+        (table,) = (table for n in generated for table in n.findall(nodes.table))
+        assert table.document is doctree
+        assert "state_out" in table.astext()
+
+    def test_resolved_doctree(self, build_sphinx, ymmsl_with_port):
+        """Test that the doctree stays compact until it is written."""
+        app = build_sphinx(ymmsl_with_port, ymmsl_compact_doctree=True)
+        doctree = app.env.get_and_resolve_doctree(
+            "index", app.builder, tags=app.builder.tags
+        )
+        (node,) = doctree.findall(ymmsl_markdown)
+        assert node["docname"] == "index"
+        assert not list(doctree.findall(nodes.table))
+
+    def test_references(self, build_sphinx, ymmsl_with_port):
+        """Test the toc, anchors and references of generated sections."""
+        content = ymmsl_with_port.replace(
+            "description: Model with ports", "description: See {doc}`index`"
+        )
+        app = build_sphinx(content, ymmsl_compact_doctree=True)
+        assert app.env.titles["index"].astext() == "yMMSL Model Documentation"
+        assert "Comp" in app.env.tocs["index"].astext()
+        html = (app.outdir / "index.html").read_text()
+        assert '<section id="comp">' in html
+        assert '<span class="doc">yMMSL Model Documentation</span>' in html
+        assert app.warning.getvalue() == ""
+
+    def test_search_exclude(self, build_sphinx, ymmsl_with_conduits):
+        """Test that sections are excluded from search when expanded."""
+        app = build_sphinx(
+            ymmsl_with_conduits,
+            ymmsl_compact_doctree=True,
+            ymmsl_search_exclude=["conduits"],
+        )
+        assert "init_in" not in (app.outdir / "searchindex.js").read_text()
+        assert "init_in" in (app.outdir / "index.html").read_text()
+
+    def test_latex(self, build_sphinx, ymmsl_with_port):
+        """Test that the compact doctree is expanded for other builders."""
+        app = build_sphinx(
+            ymmsl_with_port,
+            buildername="latex",
+            ymmsl_compact_doctree=True,
+        )
+        (tex,) = app.outdir.glob("*.tex")
+        assert "state\\_out" in tex.read_text()
+
+    def test_texinfo(self, build_sphinx, ymmsl_with_port):
+        """Test that the compact doctree is expanded before Texinfo names sections."""
+        app = build_sphinx(
+            ymmsl_with_port,
+            buildername="texinfo",
+            ymmsl_compact_doctree=True,
+        )
+        (texi,) = app.outdir.glob("*.texi")
+        text = texi.read_text()
+        assert "@node Comp" in text
+        assert "state_out" in text
+
+    @pytest.mark.parametrize(
+        "buildername, pattern",
+        [("xml", "*.xml"), ("pseudoxml", "*.pseudoxml"), ("gettext", "*.pot")],
+    )
+    def test_builder_without_translator(
+        self, build_sphinx, ymmsl_with_port, buildername, pattern
+    ):
+        """
+        Test that the compact doctree is expanded before writing for builders that do
+        not expand it when writing.
+        """
+        app = build_sphinx(ymmsl_with_port, buildername=buildername)
+        (path,) = app.outdir.glob(pattern)
+        expected = path.read_text()
+        assert "Component with port" in expected
+
+        app = build_sphinx(
+            ymmsl_with_port, buildername=buildername, ymmsl_compact_doctree=True
+        )
+        assert path.read_text() == expected
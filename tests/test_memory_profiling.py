@@ -0,0 +1,111 @@
+"""Tests for memory_profiling module.
+
+The memory ceilings are set with ample headroom over the measured usage, so that they
+catch regressions that scale badly with the size of a configuration, not noise.
+"""
+
+from sphinx_ymmsl.memory_profiling import (
+    MemoryProfiler,
+    StageMemory,
+    format_memory_report,
+    profile_ymmsl_file,
+)
+from sphinx_ymmsl.ymmsl_to_markdown import model_markdown
+
+KIB = 1024
+MIB = 1024 * KIB
+
+
+class TestMemoryProfiler:
+    """Tests for MemoryProfiler class."""
+
+    def test_measure_allocation(self):
+        """Test that a retained allocation is measured."""
+        profiler = MemoryProfiler()
+        with profiler.measure("test.ymmsl", "alloc"):
+            data = bytearray(MIB)
+
+        assert len(profiler.records) == 1
+        record = profiler.records[0]
+        assert record.source == "test.ymmsl"
+        assert record.stage == "alloc"
+        assert record.peak >= MIB
+        assert record.retained >= MIB
+        del data
+
+    def test_measure_released_allocation(self):
+        """Test that a temporary allocation counts for peak but is not retained."""
+        profiler = MemoryProfiler()
+        with profiler.measure("test.ymmsl", "alloc"):
+            data = bytearray(MIB)
+            del data
+
+        record = profiler.records[0]
+        assert record.peak >= MIB
+        assert record.retained < MIB
+
+    def test_disabled(self):
+        """Test that a disabled profiler does not record anything."""
+        profiler = MemoryProfiler(enabled=False)
+        with profiler.measure("test.ymmsl", "alloc"):
+            pass
+        assert profiler.records == []
+
+
+class TestFormatMemoryReport:
+    """Tests for format_memory_report function."""
+
+    def test_sorted_by_peak(self):
+        """Test that the stage with the largest peak is reported first."""
+        records = [
+            StageMemory("a.ymmsl", "load", 1 * KIB, 0),
+            StageMemory("b.ymmsl", "parse", 4 * KIB, 2 * KIB),
+        ]
+        result = format_memory_report(records)
+        assert result == [
+            "b.ymmsl [parse]: peak 4.0 KiB, retained 2.0 KiB",
+            "a.ymmsl [load]: peak 1.0 KiB, retained 0.0 KiB",
+        ]
+
+
+class TestMemoryCeilings:
+    """Memory ceilings for a synthetic configuration with 200 components."""
+
+    def test_profile_ymmsl_file(self, temp_ymmsl_file, large_ymmsl):
+        """Test the memory used for loading and generating markdown."""
+        temp_path = temp_ymmsl_file(large_ymmsl(200))
+        records = {r.stage: r for r in profile_ymmsl_file(temp_path)}
+
+        assert set(records) == {"load", "markdown"}
+        assert records["load"].peak < 12 * MIB
+        assert records["load"].retained < 4 * MIB
+        assert records["markdown"].peak < 1 * MIB
+        assert records["markdown"].retained < 256 * KIB
+
+    def test_model_markdown(self, load_ymmsl_config, large_ymmsl):
+        """Test the memory used by model_markdown, including the result."""
+        cfg = load_ymmsl_config(large_ymmsl(200))
+        profiler = MemoryProfiler()
+        with profiler.measure("large.ymmsl", "model_markdown"):
+            markdown = model_markdown(cfg)
+
+        record = profiler.records[0]
+        assert record.peak < 1 * MIB
+        assert record.retained < 4 * len(markdown) + 64 * KIB
+
+    def test_directive(self, build_sphinx, large_ymmsl):
+        """Test the memory used by the directive, per stage."""
+        app = build_sphinx(large_ymmsl(200), ymmsl_memory_profile=True)
+        records = {r.stage: r for r in app.env.ymmsl_memory_profile["index"]}
+
+        assert set(records) == {"load", "markdown", "parse"}
+        assert records["load"].peak < 12 * MIB
+        assert records["markdown"].peak < 1 * MIB
+        assert records["parse"].peak < 40 * MIB
+        assert records["parse"].retained < 40 * MIB
+        assert "yMMSL memory profile (3 stages):" in app.status.getvalue()
+
+    def test_directive_disabled(self, build_sphinx, ymmsl_with_model):
+        """Test that nothing is recorded by default."""
+        app = build_sphinx(ymmsl_with_model)
+        assert app.env.ymmsl_memory_profile == {}
@@ -0,0 +1,163 @@
+"""Tests for render_cache module."""
+
+import gzip
+import json
+from dataclasses import replace
+
+import pytest
+
+import sphinx_ymmsl
+from sphinx_ymmsl.render_cache import (
+    RenderedYmmsl,
+    export_bundle,
+    import_bundle,
+    render_key,
+)
+from sphinx_ymmsl.versions import YMMSL_VERSIONS
+
+KEY = "0" * 64
+
+
+@pytest.fixture
+def rendered():
+    return RenderedYmmsl("# Documentation\n", (("model", "test_model"),))
+
+
+class TestRenderKey:
+    """Tests for render_key function."""
+
+    def test_same_content(self, tmp_path, ymmsl_with_model):
+        """Test that the key depends on the file name, but not its directory."""
+        for directory in ("a", "b"):
+            (tmp_path / directory).mkdir()
+            (tmp_path / directory / "model.ymmsl").write_text(ymmsl_with_model)
+        (tmp_path / "a" / "other.ymmsl").write_text(ymmsl_with_model)
+
+        key = render_key(tmp_path / "a" / "model.ymmsl")
+        assert render_key(tmp_path / "b" / "model.ymmsl") == key
+        assert render_key(tmp_path / "a" / "other.ymmsl") != key
+
+    def test_content_changes(self, temp_ymmsl_file, ymmsl_with_model):
+        """Test that the key changes when the file changes."""
+        path = temp_ymmsl_file(ymmsl_with_model)
+        key = render_key(path)
+        path.write_text(ymmsl_with_model + "\n")
+        assert render_key(path) != key
+
+    def test_templates_change(self, temp_ymmsl_file, ymmsl_with_model):
+        """Test that the key changes with the template overrides."""
+        path = temp_ymmsl_file(ymmsl_with_model)
+        assert render_key(path, {"model": "{{ title }}\n"}) != render_key(path)
+        assert render_key(path, {}) == render_key(path)
+
+
+class TestBundle:
+    """Tests for export_bundle and import_bundle functions."""
+
+    def test_round_trip(self, tmp_path, rendered):
+        """Test that exported entries are imported again."""
+        path = tmp_path / "bundle" / "ymmsl-cache.json.gz"
+        export_bundle(path, {KEY: rendered})
+        entries, dropped = import_bundle(path)
+        assert entries == {KEY: rendered}
+        assert dropped == 0
+
+    def test_reproducible(self, tmp_path, rendered):
+        """Test that the same entries give the same file."""
+        export_bundle(tmp_path / "a", {KEY: rendered})
+        export_bundle(tmp_path / "b", {KEY: rendered})
+        assert (tmp_path / "a").read_bytes() == (tmp_path / "b").read_bytes()
+
+    def test_stale_versions(self, tmp_path, rendered):
+        """Test that entries from other versions are dropped."""
+        path = tmp_path / "bundle"
+        export_bundle(path, {KEY: rendered})
+        bundle = json.loads(gzip.decompress(path.read_bytes()))
+        bundle["versions"] = "sphinx-ymmsl 0.0.1, ymmsl 0.1"
+        path.write_bytes(gzip.compress(json.dumps(bundle).encode()))
+
+        entries, dropped = import_bundle(path)
+        assert entries == {}
+        assert dropped == 1
+
+    def test_invalid_entries(self, tmp_path, rendered):
+        """Test that malformed entries are dropped and valid ones kept."""
+        path = tmp_path / "bundle"
+        export_bundle(path, {KEY: rendered})
+        bundle = json.loads(gzip.decompress(path.read_bytes()))
+        bundle["entries"]["not-a-key"] = ["# Doc", []]
+        bundle["entries"]["1" * 64] = [42, []]
+        bundle["entries"]["2" * 64] = ["# Doc", [["planet", "earth"]]]
+        path.write_bytes(gzip.compress(json.dumps(bundle).encode()))
+
+        entries, dropped = import_bundle(path)
+        assert entries == {KEY: rendered}
+        assert dropped == 3
+
+    def test_not_a_bundle(self, tmp_path):
+        """Test that a file that is not a bundle is rejected."""
+        path = tmp_path / "bundle"
+        path.write_text("not a bundle")
+        with pytest.raises(ValueError, match="not a yMMSL render cache bundle"):
+            import_bundle(path)
+
+    def test_unknown_format(self, tmp_path):
+        """Test that a bundle in an unknown format is rejected."""
+        path = tmp_path / "bundle"
+        path.write_bytes(gzip.compress(b'{"format": 99, "entries": {}}'))
+        with pytest.raises(ValueError, match="known format"):
+            import_bundle(path)
+
+
+class TestRenderCacheConfig:
+    """Tests for the render cache configuration options."""
+
+    def test_export_and_import(self, build_sphinx, ymmsl_with_port, monkeypatch):
+        """Test that a second build uses the bundle exported by the first one."""
+        app = build_sphinx(ymmsl_with_port, ymmsl_cache_export="cache.json.gz")
+        bundle = app.srcdir / "cache.json.gz"
+        assert bundle.exists()
+        html = (app.outdir / "index.html").read_text()
+
+        def fail(ymmsl_path):
+            raise AssertionError("yMMSL file loaded despite the cache")
+
+        handler = YMMSL_VERSIONS["v0.2"]
+        monkeypatch.setitem(YMMSL_VERSIONS, "v0.2", replace(handler, load=fail))
+        app = build_sphinx(ymmsl_with_port, ymmsl_cache_import="cache.json.gz")
+        assert "Imported 1 rendered yMMSL file(s)" in app.status.getvalue()
+        assert "Using cached documentation" in app.status.getvalue()
+        assert (app.outdir / "index.html").read_text() == html
+        assert [e.name for e in app.env.ymmsl_entities["index"]] == [
+            "test_model",
+            "test_model.comp",
+            "test_model.comp.state_out",
+        ]
+
+    def test_not_recorded(self, build_sphinx, ymmsl_with_port):
+        """Test that rendered documentation is only kept when it is exported."""
+        app = build_sphinx(ymmsl_with_port)
+        assert app.env.ymmsl_rendered == {}
+
+    def test_no_key(self, build_sphinx, ymmsl_with_port, monkeypatch):
+        """Test that yMMSL files are not hashed when the cache is not used."""
+
+        def render_key(*args, **kwargs):
+            raise AssertionError("render_key called")
+
+        monkeypatch.setattr(sphinx_ymmsl, "render_key", render_key)
+        app = build_sphinx(ymmsl_with_port)
+        assert "state_out" in (app.outdir / "index.html").read_text()
+
+    def test_changed_file(self, build_sphinx, ymmsl_with_port, ymmsl_with_model):
+        """Test that a changed yMMSL file is rendered again."""
+        build_sphinx(ymmsl_with_port, ymmsl_cache_export="cache.json.gz")
+        app = build_sphinx(ymmsl_with_model, ymmsl_cache_import="cache.json.gz")
+        assert "Generating documentation" in app.status.getvalue()
+        assert "A test model" in (app.outdir / "index.html").read_text()
+
+    def test_missing_bundle(self, build_sphinx, ymmsl_with_model):
+        """Test that a missing bundle gives a cold start."""
+        app = build_sphinx(ymmsl_with_model, ymmsl_cache_import="missing.json.gz")
+        assert "starting cold" in app.status.getvalue()
+        assert app.warning.getvalue() == ""
@@ -0,0 +1,223 @@
+"""Tests for search module."""
+
+import json
+
+import pytest
+from docutils import nodes
+from sphinx.errors import ConfigError
+
+from sphinx_ymmsl.search import (
+    EntityIndex,
+    YmmslEntity,
+    collect_entities,
+    configuration_entities,
+    exclude_from_search,
+)
+
+
+@pytest.fixture
+def generated_nodes():
+    """Nodes as generated for a component with a description and a ports table."""
+    section = nodes.section(ids=["comp"])
+    section += nodes.title(text="Comp")
+    section += nodes.paragraph(text="This is a component")
+    section += nodes.container(classes=["ymmsl-ports"])
+    return [section]
+
+
+class TestExcludeFromSearch:
+    """Tests for exclude_from_search function."""
+
+    def test_exclude_nothing(self, generated_nodes):
+        """Test that nothing is marked by default."""
+        exclude_from_search(generated_nodes, [])
+        for node in generated_nodes[0].findall(nodes.Element):
+            assert "no-search" not in node["classes"]
+
+    def test_exclude_ports(self, generated_nodes):
+        """Test excluding the ports tables."""
+        exclude_from_search(generated_nodes, ["ports"])
+        title, paragraph, container = generated_nodes[0].children
+        assert "no-search" in container["classes"]
+        assert "no-search" not in paragraph["classes"]
+        assert "no-search" not in title["classes"]
+
+    def test_names_only(self, generated_nodes):
+        """Test that titles remain when all sections are excluded."""
+        exclude_from_search(generated_nodes, ["ports", "conduits", "settings", "text"])
+        section = generated_nodes[0]
+        title, paragraph, container = section.children
+        assert "no-search" not in section["classes"]
+        assert "no-search" not in title["classes"]
+        assert "no-search" in paragraph["classes"]
+        assert "no-search" in container["classes"]
+
+
+class TestConfigurationEntities:
+    """Tests for configuration_entities function."""
+
+    def test_component_and_port(self, load_ymmsl_config, ymmsl_with_port):
+        """Test a model with a component and a port."""
+        cfg = load_ymmsl_config(ymmsl_with_port)
+        assert configuration_entities(cfg) == [
+            ("model", "test_model"),
+            ("component", "test_model.comp"),
+            ("port", "test_model.comp.state_out"),
+        ]
+
+    def test_no_models(self, load_ymmsl_config, minimal_ymmsl):
+        """Test a configuration without models."""
+        cfg = load_ymmsl_config(minimal_ymmsl)
+        assert configuration_entities(cfg) == []
+
+
+def section(level: int, title: str, section_id: str, *children) -> nodes.section:
+    """A section nested in level - 1 untitled sections, with children sections."""
+    node = nodes.section(ids=[section_id])
+    node += nodes.title(text=title)
+    node.extend(children)
+    for _ in range(level - 1):
+        node = nodes.section("", node)
+    return node
+
+
+class TestCollectEntities:
+    """Tests for collect_entities function."""
+
+    def test_anchors(self):
+        """Test that anchors are found by title, and inherited by ports."""
+        names = [
+            ("model", "test_model"),
+            ("component", "test_model.comp"),
+            ("port", "test_model.comp.state_out"),
+        ]
+        node_list = [
+            section(3, "Test Model", "model-anchor", section(1, "Comp", "comp-anchor"))
+        ]
+
+        entities = collect_entities(names, "index", node_list)
+        assert entities == [
+            YmmslEntity("model", "test_model", "index", "model-anchor"),
+            YmmslEntity("component", "test_model.comp", "index", "comp-anchor"),
+            YmmslEntity("port", "test_model.comp.state_out", "index", "comp-anchor"),
+        ]
+
+    def test_level(self):
+        """Test that titles at other section levels are skipped."""
+        names = [("model", "models")]
+        node_list = [section(2, "Models", "id1", section(1, "Models", "id2"))]
+        assert collect_entities(names, "index", node_list)[0].anchor == "id2"
+
+    def test_same_names(self, build_sphinx):
+        """Test components with the same names as each other and as sections."""
+        content = """ymmsl_version: v0.2
+models:
+  model_a:
+    description: A
+    components:
+      macro: {description: x, ports: {o_i: out}}
+      micro: {description: x, ports: {f_init: inp}}
+    conduits:
+      macro.out: micro.inp
+  model_b:
+    description: B
+    components:
+      macro: {description: x, ports: {o_i: out}}
+      conduits: {description: x, ports: {f_init: inp}}
+    conduits:
+      macro.out: conduits.inp
+"""
+        app = build_sphinx(content)
+        html = (app.outdir / "index.html").read_text()
+        anchors = {e.name: e.anchor for e in app.env.ymmsl_entities["index"]}
+        # The sections of model_b get numbered ids, as their titles are taken
+        assert '<section id="id1">\n<h4>Macro' in html
+        assert '<section id="id2">\n<h4>Conduits' in html
+        assert anchors["model_a.macro"] == "macro"
+        assert anchors["model_b.macro"] == "id1"
+        assert anchors["model_b.conduits"] == "id2"
+        assert anchors["model_b.conduits.inp"] == "id2"
+
+
+class TestEntityIndex:
+    """Tests for EntityIndex class."""
+
+    @pytest.fixture
+    def index(self):
+        return EntityIndex(
+            [
+                YmmslEntity("model", "macro_micro", "index"),
+                YmmslEntity("component", "macro_micro.macro", "index", "macro"),
+                YmmslEntity("port", "macro_micro.macro.state_out", "index", "macro"),
+                YmmslEntity("component", "macro_micro.micro", "other", "micro"),
+            ]
+        )
+
+    def test_short_name(self, index):
+        """Test lookup by the start of a short name."""
+        names = [entity.name for entity in index.lookup("mic")]
+        assert names == ["macro_micro.micro"]
+
+    def test_qualified_name(self, index):
+        """Test case-insensitive lookup by the start of a qualified name."""
+        names = [entity.name for entity in index.lookup("Macro_Micro.Macro.")]
+        assert names == ["macro_micro.macro.state_out"]
+
+    def test_no_duplicates(self, index):
+        """Test that entities matching by short and qualified name are found once."""
+        names = [entity.name for entity in index.lookup("macro")]
+        assert sorted(names) == [
+            "macro_micro",
+            "macro_micro.macro",
+            "macro_micro.macro.state_out",
+            "macro_micro.micro",
+        ]
+
+    def test_not_found(self, index):
+        """Test a prefix that matches nothing."""
+        assert index.lookup("meso") == []
+
+    def test_to_json(self, index):
+        """Test the compact JSON representation."""
+        result = json.loads(index.to_json({"index": "index.html", "other": "o.html"}))
+        assert result["kinds"] == ["component", "model", "port"]
+        assert result["docs"] == ["index.html", "o.html"]
+        assert result["entities"][0] == [1, "macro_micro", 0, ""]
+        short_names = [
+            result["entities"][i][1].rsplit(".", 1)[-1] for i in result["short"]
+        ]
+        assert short_names == sorted(short_names)
+
+
+class TestSearchConfig:
+    """Tests for the search configuration options."""
+
+    def test_exclude(self, build_sphinx, ymmsl_with_conduits):
+        """Test that excluded sections do not end up in the search index."""
+        app = build_sphinx(ymmsl_with_conduits, ymmsl_search_exclude=["conduits"])
+        searchindex = (app.outdir / "searchindex.js").read_text()
+        assert "init_in" not in searchindex
+        assert "ymmsl-conduits" in (app.outdir / "index.html").read_text()
+
+    def test_include_by_default(self, build_sphinx, ymmsl_with_conduits):
+        """Test that all sections are in the search index by default."""
+        app = build_sphinx(ymmsl_with_conduits)
+        assert "init_in" in (app.outdir / "searchindex.js").read_text()
+
+    def test_invalid_exclude(self, build_sphinx, ymmsl_with_model):
+        """Test that an unknown section is a configuration error."""
+        with pytest.raises(ConfigError, match="Invalid ymmsl_search_exclude"):
+            build_sphinx(ymmsl_with_model, ymmsl_search_exclude=["models"])
+
+    def test_entity_index(self, build_sphinx, ymmsl_with_port):
+        """Test that the entity index is written."""
+        app = build_sphinx(ymmsl_with_port)
+        index = json.loads((app.outdir / "_static" / "ymmsl-entities.json").read_text())
+        names = [entity[1] for entity in index["entities"]]
+        assert names == ["test_model", "test_model.comp", "test_model.comp.state_out"]
+        assert index["docs"] == ["index.html"]
+
+    def test_entity_index_disabled(self, build_sphinx, ymmsl_with_port):
+        """Test that the entity index can be disabled."""
+        app = build_sphinx(ymmsl_with_port, ymmsl_entity_index=False)
+        assert not (app.outdir / "_static" / "ymmsl-entities.json").exists()
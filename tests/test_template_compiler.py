@@ -0,0 +1,100 @@
+"""Tests for template_compiler module."""
+
+import jinja2
+import pytest
+
+from sphinx_ymmsl.template_compiler import compile_template
+
+
+@pytest.fixture
+def environment():
+    """A Jinja2 environment configured like the one of MarkdownTemplates."""
+    return jinja2.Environment(
+        autoescape=False,
+        keep_trailing_newline=True,
+        trim_blocks=True,
+        undefined=jinja2.StrictUndefined,
+    )
+
+
+class TestCompileTemplate:
+    """Tests for compile_template function."""
+
+    @pytest.mark.parametrize(
+        "source, context",
+        [
+            ("plain text with {braces} and 'quotes'\n", {}),
+            ("{{ name }} {{ name|upper }} {{ name|title }}", {"name": "a_b"}),
+            ('{{ "x" * n }}{{ n + 1 }} {{ -n }} {{ n // 2 }}', {"n": 3}),
+            ("{{ a ~ b ~ 1 }}", {"a": "x", "b": None}),
+            ('{{ items|join(", ") }}|{{ items|join }}', {"items": [1, "b", None]}),
+            ("{{ items|length }} {{ items|count }}", {"items": [1, 2]}),
+            ("{{ d.key }} {{ d['key'] }}", {"d": {"key": "v"}}),
+            ('{{ missing|default("none") }}', {}),
+            ("{% if a %}A{% elif b %}B{% else %}C{% endif %}", {"a": 0, "b": 1}),
+            ("{% if a and not b or a > 1 %}yes{% endif %}", {"a": 2, "b": 1}),
+            ("{{ 'x' if a in b else 'y' }}", {"a": 1, "b": [1]}),
+            (
+                "{% for a, b in pairs %}{{ a }}={{ b }};{% endfor %}",
+                {"pairs": [(1, 2)]},
+            ),
+            (
+                "{% for x in xs %}{{ loop.index }}/{{ loop.length }}"
+                "{% if not loop.last %}, {% endif %}{% endfor %}",
+                {"xs": "abc"},
+            ),
+            (
+                "{% for x in xs %}{% for y in x %}{{ loop.first }}{{ y }}{% endfor %}"
+                "{% else %}empty{% endfor %}",
+                {"xs": ["ab", "c"]},
+            ),
+            ("{% for x in xs %}{{ x }}{% else %}empty{% endfor %}", {"xs": []}),
+            ("{{ content }}", {"content": "{{ not a template }}"}),
+        ],
+    )
+    def test_same_as_jinja(self, environment, source, context):
+        """Test that compiled templates render the same as Jinja2."""
+        render = compile_template(environment, source)
+        assert render is not None
+        expected = environment.from_string(source).render(**context)
+        assert render(**context) == expected
+
+    @pytest.mark.parametrize(
+        "source",
+        [
+            "{% set x = 1 %}{{ x }}",
+            "{% macro m() %}{% endmacro %}",
+            "{{ range(3)|list }}",
+            "{{ items|sort }}",
+            "{{ loop }}",
+            "{% for x in xs if x %}{{ x }}{% endfor %}",
+            "{{ _t_parts }}",
+            "{{ items[1:] }}",
+        ],
+    )
+    def test_unsupported(self, environment, source):
+        """Test that templates that cannot be compiled are left to Jinja2."""
+        assert compile_template(environment, source) is None
+
+    def test_autoescape(self):
+        """Test that templates of environments with autoescaping are not compiled."""
+        environment = jinja2.Environment(autoescape=True)
+        assert compile_template(environment, "{{ name }}") is None
+
+    def test_undefined(self, environment):
+        """Test that undefined variables and attributes raise an error."""
+        render = compile_template(environment, "{{ a.b }}")
+        with pytest.raises(jinja2.UndefinedError):
+            render()
+        with pytest.raises(jinja2.UndefinedError):
+            render(a=object())
+
+    def test_extra_variables(self, environment):
+        """Test that variables the template does not use are ignored."""
+        render = compile_template(environment, "{{ a }}")
+        assert render(a=1, b=2, environment=3) == "1"
+
+    def test_syntax_error(self, environment):
+        """Test that invalid templates raise a syntax error."""
+        with pytest.raises(jinja2.TemplateSyntaxError):
+            compile_template(environment, "{% if %}")
@@ -0,0 +1,117 @@
+"""Tests for templates module."""
+
+import jinja2
+import pytest
+from sphinx.errors import ConfigError
+
+from sphinx_ymmsl.templates import MarkdownTemplates, get_templates
+from sphinx_ymmsl.ymmsl_to_markdown import (
+    component_markdown,
+    ports_markdown,
+    ymmsl_to_markdown,
+)
+
+
+class TestMarkdownTemplates:
+    """Tests for MarkdownTemplates class."""
+
+    @pytest.mark.parametrize(
+        "fixture",
+        [
+            "minimal_ymmsl",
+            "ymmsl_with_model",
+            "ymmsl_with_settings",
+            "ymmsl_with_conduits",
+            "ymmsl_with_min_component",
+            "ymmsl_with_full_component",
+            "ymmsl_with_port",
+        ],
+    )
+    def test_compiled_templates_match_jinja(self, request, temp_ymmsl_file, fixture):
+        """Test that the compiled default templates render the same as Jinja2."""
+        temp_path = temp_ymmsl_file(request.getfixturevalue(fixture))
+        jinja_templates = MarkdownTemplates(compiled=False)
+
+        expected = ymmsl_to_markdown(temp_path)
+        assert ymmsl_to_markdown(temp_path, jinja_templates) == expected
+
+    def test_large_configuration(self, temp_ymmsl_file, large_ymmsl):
+        """Test the Jinja2 default templates on a configuration with many sections."""
+        temp_path = temp_ymmsl_file(large_ymmsl(20))
+        jinja_templates = MarkdownTemplates(compiled=False)
+        assert ymmsl_to_markdown(temp_path, jinja_templates) == ymmsl_to_markdown(
+            temp_path
+        )
+
+    def test_topology(self, temp_ymmsl_file, large_ymmsl, ymmsl_with_port):
+        """Test the Jinja2 default templates on the coupling topology statistics."""
+        jinja_templates = MarkdownTemplates(compiled=False)
+        for content in (large_ymmsl(20), ymmsl_with_port):
+            temp_path = temp_ymmsl_file(content)
+            expected = ymmsl_to_markdown(temp_path, topology=True)
+            assert "Coupling Topology" in expected
+            result = ymmsl_to_markdown(temp_path, jinja_templates, topology=True)
+            assert result == expected
+
+    def test_override(self, load_ymmsl_config, ymmsl_with_full_component):
+        """Test overriding the component template."""
+        cfg = load_ymmsl_config(ymmsl_with_full_component)
+        component = cfg.models["test_model"].components["comp"]
+        templates = MarkdownTemplates(
+            {"component": "## {{ name }} ({{ implementation }})\n"}
+        )
+        result = component_markdown("comp", component, templates)
+        assert result == ["## comp (comp_program)"]
+
+    def test_override_ports(self, load_ymmsl_config, ymmsl_with_port):
+        """Test overriding the ports template, including its container."""
+        cfg = load_ymmsl_config(ymmsl_with_port)
+        ports = cfg.models["test_model"].components["comp"].ports
+        templates = MarkdownTemplates({"ports": "{{ table }}\n\n"})
+        result = ports_markdown(ports, templates=templates)
+        assert result == [
+            "| Operator | Port Name |",
+            "| -------- | --------- |",
+            "| O_I | state_out |",
+            "",
+        ]
+
+    def test_unknown_template(self):
+        """Test that overriding an unknown section is an error."""
+        with pytest.raises(ValueError, match="Unknown yMMSL template"):
+            MarkdownTemplates({"port": "{{ name }}"})
+
+    def test_invalid_template(self):
+        """Test that a template with a syntax error is rejected."""
+        with pytest.raises(jinja2.TemplateSyntaxError):
+            MarkdownTemplates({"component": "{% if name %}"})
+
+
+class TestGetTemplates:
+    """Tests for get_templates function."""
+
+    def test_cached(self):
+        """Test that templates are compiled once for the same overrides."""
+        overrides = {"conduits": "Conduits\n"}
+        assert get_templates(overrides) is get_templates(dict(overrides))
+        assert get_templates() is get_templates({})
+        assert get_templates(overrides) is not get_templates()
+
+
+class TestTemplatesConfig:
+    """Tests for the ymmsl_templates configuration option."""
+
+    def test_override(self, build_sphinx, ymmsl_with_full_component):
+        """Test that an override in conf.py is used by the directive."""
+        app = build_sphinx(
+            ymmsl_with_full_component,
+            ymmsl_templates={"component": "#### Custom {{ title }}\n"},
+        )
+        html = (app.outdir / "index.html").read_text()
+        assert "Custom Comp" in html
+        assert "comp_program" not in html
+
+    def test_invalid(self, build_sphinx, ymmsl_with_model):
+        """Test that an invalid override is reported as a configuration error."""
+        with pytest.raises(ConfigError, match="Invalid ymmsl_templates"):
+            build_sphinx(ymmsl_with_model, ymmsl_templates={"unknown": ""})
@@ -0,0 +1,128 @@
+"""Tests for topology module."""
+
+import pytest
+
+from sphinx_ymmsl.render_cache import render_key
+from sphinx_ymmsl.topology import ComponentTopology, model_topology
+
+YMMSL_WITH_TOPOLOGY = """ymmsl_version: v0.2
+
+description: Configuration with a coupled model
+
+models:
+  coupled:
+    description: A model with coupled and isolated components
+    ports:
+      f_init: init_in
+      o_f: final_out
+    components:
+      macro:
+        description: Macro model
+        ports:
+          o_i: state_out
+          s: state_in
+          o_f: final_out
+      micro:
+        description: Micro model
+        ports:
+          f_init: init_in
+          o_f: final_out
+      spare:
+        description: Unused model
+        ports: {}
+    conduits:
+      init_in: macro.state_in
+      macro.state_out: micro.init_in
+      micro.final_out: macro.state_in
+      macro.final_out: final_out
+"""
+
+
+@pytest.fixture
+def topology(load_ymmsl_config):
+    cfg = load_ymmsl_config(YMMSL_WITH_TOPOLOGY)
+    return model_topology(cfg.models["coupled"])
+
+
+class TestModelTopology:
+    """Tests for model_topology function and ModelTopology class."""
+
+    def test_fan_in_and_out(self, topology):
+        """Test that conduits to model ports only count for the components."""
+        assert topology.components == (
+            ComponentTopology("macro", 2, 2),
+            ComponentTopology("micro", 1, 1),
+            ComponentTopology("spare", 0, 0),
+        )
+        assert topology.num_conduits == 4
+
+    def test_isolated(self, topology):
+        """Test finding components without conduits."""
+        assert topology.isolated == ["spare"]
+
+    def test_most_connected(self, topology):
+        """Test that isolated components are not listed as connected."""
+        names = [c.name for c in topology.most_connected()]
+        assert names == ["macro", "micro"]
+        assert [c.name for c in topology.most_connected(1)] == ["macro"]
+
+    def test_ports_by_operator(self, topology):
+        """Test that ports are counted by operator, in execution loop order."""
+        assert list(topology.ports_by_operator.items()) == [
+            ("F_INIT", 2),
+            ("O_I", 1),
+            ("S", 1),
+            ("O_F", 3),
+        ]
+
+    def test_ring(self, load_ymmsl_config, large_ymmsl):
+        """Test a large model in which all components are equally connected."""
+        cfg = load_ymmsl_config(large_ymmsl(100))
+        topology = model_topology(cfg.models["large_model"])
+        assert all(c.fan_in == c.fan_out == 1 for c in topology.components)
+        assert topology.isolated == []
+        names = [c.name for c in topology.most_connected()]
+        assert names == [f"comp_{i}" for i in range(100)]
+        names = [c.name for c in topology.most_connected(5)]
+        assert names == ["comp_0", "comp_1", "comp_2", "comp_3", "comp_4"]
+        assert topology.ports_by_operator == {
+            "F_INIT": 100,
+            "O_I": 100,
+            "S": 100,
+            "O_F": 100,
+        }
+
+
+class TestTopologyConfig:
+    """Tests for the ymmsl_topology configuration option."""
+
+    def test_enabled(self, build_sphinx):
+        """Test that the statistics are rendered when enabled."""
+        app = build_sphinx(YMMSL_WITH_TOPOLOGY, ymmsl_topology=True)
+        html = (app.outdir / "index.html").read_text()
+        assert "Coupling Topology" in html
+        assert "ymmsl-topology" in html
+
+    def test_disabled_by_default(self, build_sphinx):
+        """Test that the statistics are not rendered by default."""
+        app = build_sphinx(YMMSL_WITH_TOPOLOGY)
+        assert "Coupling Topology" not in (app.outdir / "index.html").read_text()
+
+    def test_limit(self, build_sphinx):
+        """Test limiting the number of components that are listed."""
+        app = build_sphinx(
+            YMMSL_WITH_TOPOLOGY, ymmsl_topology=True, ymmsl_topology_limit=1
+        )
+        html = (app.outdir / "index.html").read_text()
+        assert "<td><p>macro</p></td>" in html
+        assert "<td><p>micro</p></td>" not in html
+
+    def test_render_key(self, temp_ymmsl_file):
+        """Test that documentation with and without statistics is cached separately."""
+        path = temp_ymmsl_file(YMMSL_WITH_TOPOLOGY)
+        assert render_key(path, {}, {"topology": True}) != render_key(
+            path, {}, {"topology": False}
+        )
+        assert render_key(
+            path, {}, {"topology": True, "topology_limit": None}
+        ) != render_key(path, {}, {"topology": True, "topology_limit": 1})
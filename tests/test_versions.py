@@ -0,0 +1,109 @@
+"""Tests for versions module."""
+
+import pytest
+
+from sphinx_ymmsl.versions import (
+    YMMSL_VERSIONS,
+    UnsupportedYmmslVersion,
+    YmmslVersion,
+    get_ymmsl_version,
+    register_ymmsl_version,
+)
+
+YMMSL_V0_1 = """ymmsl_version: v0.1
+
+model:
+  name: test_model
+  components:
+    comp: comp_program
+"""
+
+
+class TestGetYmmslVersion:
+    """Tests for get_ymmsl_version function."""
+
+    def test_supported(self):
+        """Test that v0.1 and v0.2 are supported."""
+        assert get_ymmsl_version("v0.1") is YMMSL_VERSIONS["v0.1"]
+        assert get_ymmsl_version("v0.2") is YMMSL_VERSIONS["v0.2"]
+
+    def test_unsupported(self):
+        """Test that an unknown version is rejected."""
+        with pytest.raises(UnsupportedYmmslVersion, match="unsupported ymmsl_version"):
+            get_ymmsl_version("v9.9")
+
+    def test_missing(self):
+        """Test that a missing version is rejected."""
+        with pytest.raises(UnsupportedYmmslVersion, match="no ymmsl_version"):
+            get_ymmsl_version(None)
+
+
+class TestRegisterYmmslVersion:
+    """Tests for register_ymmsl_version function."""
+
+    def test_register(self, monkeypatch):
+        """Test registering a handler for a new version."""
+        monkeypatch.setattr("sphinx_ymmsl.versions.YMMSL_VERSIONS", {})
+        handler = YmmslVersion(lambda path: None, lambda *args: "", lambda cfg: [])
+        register_ymmsl_version("v1.0", handler)
+        assert get_ymmsl_version("v1.0") is handler
+
+
+class TestVersionDispatch:
+    """Tests for version dispatch in the ymmsl directive."""
+
+    def test_v0_1(self, build_sphinx):
+        """Test that v0.1 files are converted and documented."""
+        with pytest.warns(UserWarning):
+            app = build_sphinx(YMMSL_V0_1)
+        html = (app.outdir / "index.html").read_text()
+        assert "comp_program" in html
+        assert app.warning.getvalue() == ""
+
+    def test_unsupported(self, build_sphinx, monkeypatch):
+        """Test that unsupported files are rejected without loading them."""
+
+        def fail(ymmsl_path):
+            raise AssertionError("Unsupported yMMSL file was loaded")
+
+        monkeypatch.setattr("sphinx_ymmsl.render_key", fail)
+        monkeypatch.setattr("sphinx_ymmsl.load_version", fail)
+        app = build_sphinx("ymmsl_version: v9.9\n")
+        warnings = app.warning.getvalue()
+        assert "Cannot document ymmsl file model.ymmsl" in warnings
+        assert "unsupported ymmsl_version v9.9" in warnings
+        assert "[ymmsl.version]" in warnings
+
+    def test_version_not_at_start(self, build_sphinx, ymmsl_with_model):
+        """Test that the file is loaded if no version is found at its start."""
+        content = "description: Test\n" + ymmsl_with_model.replace(
+            "description: Configuration with model\n", ""
+        )
+        app = build_sphinx(content, ymmsl_version_sniff_bytes=10)
+        assert app.warning.getvalue() == ""
+        html = (app.outdir / "index.html").read_text()
+        assert "<strong>yMMSL version</strong>" in html
+
+    def test_no_version(self, build_sphinx):
+        """Test that files without a version are skipped with a warning."""
+        app = build_sphinx("description: Test\n")
+        assert "no ymmsl_version found" in app.warning.getvalue()
+
+    @pytest.mark.parametrize(
+        "start",
+        ["\ufeffymmsl_version: v0.2\n", '"ymmsl_version": v0.2\n'],
+    )
+    def test_version_written_differently(self, build_sphinx, ymmsl_with_model, start):
+        """Test files with a byte order mark or a quoted key, which ymmsl loads."""
+        content = ymmsl_with_model.replace("ymmsl_version: v0.2\n", start)
+        app = build_sphinx(content)
+        assert app.warning.getvalue() == ""
+        assert "A test model" in (app.outdir / "index.html").read_text()
+
+    def test_version_far_from_start(self, build_sphinx, ymmsl_with_model):
+        """Test that a version found after the default limit is documented."""
+        content = "# padding\n" * 900 + ymmsl_with_model
+        app = build_sphinx(content, ymmsl_version_sniff_bytes=20000)
+        assert app.warning.getvalue() == ""
+        html = (app.outdir / "index.html").read_text()
+        assert "<strong>yMMSL version</strong>" in html
@@ -11,8 +11,10 @@ from sphinx_ymmsl.ymmsl_to_markdown import (
     generate_header,
     generate_model_header,
     generate_supported_settings_markdown,
+    load_version,
     model_markdown,
     ports_markdown,
+    topology_markdown,
     ymmsl_to_markdown,
 )
 
@@ -74,6 +76,51 @@ class TestExtractVersionFromFile:
         version = extract_version_from_file(temp_path)
         assert version is None
 
+    def test_extract_quoted_version(self, temp_ymmsl_file):
+        """Test that quotes and comments around the version are removed."""
+        temp_path = temp_ymmsl_file("ymmsl_version: 'v0.2'  # latest\n")
+        version = extract_version_from_file(temp_path)
+        assert version == "v0.2"
+
+    def test_extract_version_quoted_key(self, temp_ymmsl_file):
+        """Test extracting the version with a quoted key."""
+        temp_path = temp_ymmsl_file('"ymmsl_version": v0.2\n')
+        assert extract_version_from_file(temp_path) == "v0.2"
+        temp_path = temp_ymmsl_file("'ymmsl_version' : v0.2\n")
+        assert extract_version_from_file(temp_path) == "v0.2"
+
+    def test_extract_version_bom(self, temp_ymmsl_file):
+        """Test extracting the version after a UTF-8 byte order mark."""
+        temp_path = temp_ymmsl_file("\ufeffymmsl_version: v0.2\n")
+        assert temp_path.read_bytes().startswith(b"\xef\xbb\xbf")
+        assert extract_version_from_file(temp_path) == "v0.2"
+
+    def test_extract_version_bounded(self, temp_ymmsl_file):
+        """Test that only the start of the file is searched for the version."""
+        content = "description: Test\n" + "# padding\n" * 100 + "ymmsl_version: v0.2\n"
+        temp_path = temp_ymmsl_file(content)
+        assert extract_version_from_file(temp_path, limit=100) is None
+        assert extract_version_from_file(temp_path, limit=len(content)) == "v0.2"
+
+    def test_extract_version_cut_off(self, temp_ymmsl_file):
+        """Test that a version on a line that is cut off is not used."""
+        temp_path = temp_ymmsl_file("ymmsl_version: v0.2\n")
+        assert extract_version_from_file(temp_path, limit=18) is None
+
+
+class TestLoadVersion:
+    """Tests for load_version function."""
+
+    def test_load_version(self, temp_ymmsl_file, ymmsl_with_model):
+        """Test finding the version of a file in which it cannot be sniffed."""
+        content = '{"ymmsl_version": "v0.1", "model": {"name": "m"}}\n'
+        assert load_version(temp_ymmsl_file(content)) == "v0.1"
+        assert load_version(temp_ymmsl_file(ymmsl_with_model)) == "v0.2"
+
+    def test_invalid_file(self, temp_ymmsl_file):
+        """Test that no version is found in a file that cannot be loaded."""
+        assert load_version(temp_ymmsl_file("description: Test\n")) is None
+
 
 class TestModelMarkdown:
     """Tests for model_markdown function."""
@@ -195,6 +242,47 @@ class TestPortsMarkdown:
         assert "### Model Ports" in result
 
 
+class TestTopologyMarkdown:
+    """Tests for topology_markdown function."""
+
+    def test_empty_model(self, load_ymmsl_config, ymmsl_with_model):
+        """Test with a model without components and conduits."""
+        cfg = load_ymmsl_config(ymmsl_with_model)
+        result = topology_markdown(cfg.models["test_model"])
+        assert result == []
+
+    def test_single_component(self, load_ymmsl_config, ymmsl_with_port):
+        """Test with a model with a single component that is not coupled."""
+        cfg = load_ymmsl_config(ymmsl_with_port)
+        result = topology_markdown(cfg.models["test_model"])
+        result_str = "\n".join(result)
+
+        assert "#### Coupling Topology" in result
+        assert "**Components**: 1, **Conduits**: 0" in result
+        assert "**Isolated components**: `comp`" in result
+        assert "| Component | Conduits | Fan-in | Fan-out |" not in result_str
+        assert "| O_I | 1 |" in result_str
+
+    def test_all_components(self, load_ymmsl_config, large_ymmsl):
+        """Test that the conduits of all coupled components are listed by default."""
+        cfg = load_ymmsl_config(large_ymmsl(20))
+        result = topology_markdown(cfg.models["large_model"])
+        assert all(f"| comp_{i} | 2 | 1 | 1 |" in result for i in range(20))
+
+        result = topology_markdown(cfg.models["large_model"], limit=3)
+        assert [line for line in result if line.startswith("| comp_")] == [
+            "| comp_0 | 2 | 1 | 1 |",
+            "| comp_1 | 2 | 1 | 1 |",
+            "| comp_2 | 2 | 1 | 1 |",
+        ]
+
+    def test_enabled_in_document(self, temp_ymmsl_file, ymmsl_with_port):
+        """Test that the statistics are only included when enabled."""
+        temp_path = temp_ymmsl_file(ymmsl_with_port)
+        assert "Coupling Topology" not in ymmsl_to_markdown(temp_path)
+        assert "Coupling Topology" in ymmsl_to_markdown(temp_path, topology=True)
+
+
 class TestYmmslToMarkdown:
     """Integration test for ymmsl_to_markdown function."""
 